@@ -1,4 +1,5 @@
 from django.contrib import admin
-from accounts.models import UserAccount
+from accounts.models import UserAccount, Follow
 
 admin.site.register(UserAccount)
+admin.site.register(Follow)
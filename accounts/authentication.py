@@ -0,0 +1,92 @@
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import router
+from django.db.models import DEFERRED
+from django.utils.translation import gettext_lazy as _
+
+
+# fields of authenticated user kept in cache, secrets like password hash are never cached
+CACHED_USER_FIELDS = ('id', 'username', 'is_active', 'is_staff', 'is_superuser')
+
+
+def get_user_cache_key(user_id) -> str:
+    return f'auth:user-fields:{user_id}'
+
+
+def invalidate_cached_user(user_id):
+    """Drop user from authentication cache, next request will load it from database"""
+    caches[settings.AUTH_USER_CACHE_ALIAS].delete(get_user_cache_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication resolving users from short-living cache instead of database on every request.
+    With AUTH_TOKEN_USER_FOR_READS setting, safe requests get TokenUser built from token claims,
+    without any lookup at all.
+    """
+
+    def authenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+
+        if settings.AUTH_TOKEN_USER_FOR_READS and request.method in SAFE_METHODS:
+            if jwt_settings.USER_ID_CLAIM not in validated_token:
+                raise InvalidToken(_("Token contained no recognizable user identification"))
+            return jwt_settings.TOKEN_USER_CLASS(validated_token), validated_token
+
+        return self.get_user(validated_token), validated_token
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        if not settings.AUTH_USER_CACHE_TIMEOUT:
+            return super().get_user(validated_token)
+
+        cache = caches[settings.AUTH_USER_CACHE_ALIAS]
+        key = get_user_cache_key(user_id)
+        cached = cache.get(key)
+        if cached is None:
+            # checks that user exists and is active, only such users are cached
+            user = super().get_user(validated_token)
+            cache.set(key, self.dump_user(user), settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+
+        values, password_hash = cached
+        if jwt_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != password_hash:
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return self.load_user(values)
+
+    @staticmethod
+    def dump_user(user) -> tuple:
+        """Cached fields of user and hash of its password for revoke check, password itself is not cached"""
+        values = [getattr(user, field) for field in CACHED_USER_FIELDS]
+        return values, get_md5_hash_password(user.password) if jwt_settings.CHECK_REVOKE_TOKEN else None
+
+    def load_user(self, values):
+        """
+        User of cached fields, other fields are deferred and loaded from database on access,
+        save() of such user updates loaded fields only
+        """
+        fields = [field.attname for field in self.user_model._meta.concrete_fields]
+        cached = dict(zip(CACHED_USER_FIELDS, values))
+        return self.user_model.from_db(
+            router.db_for_read(self.user_model), fields, [cached.get(field, DEFERRED) for field in fields]
+        )
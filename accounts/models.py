@@ -3,12 +3,15 @@ from datetime import datetime, timedelta, timezone
 
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from django.db import models
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser, PermissionsMixin, BaseUserManager
 from django.utils.timezone import now
 
+from app.images import process_image
 from app.utils import get_profile_image_upload_path, get_random_profile_picture, is_not_default_pic
 from app.exceptions import UsernameException
+from jobs.tasks import generate_image_thumbnails, delete_image_files
 
 
 class UserAccountManager(BaseUserManager):
@@ -45,6 +48,7 @@ class UserAccount(AbstractUser, PermissionsMixin):
     is_active = models.BooleanField(default=False)
     is_staff = models.BooleanField(default=False)
     image = models.ImageField(upload_to=get_profile_image_upload_path, blank=True, null=True)
+    followers_count = models.IntegerField(default=0, editable=False)
 
     objects = UserAccountManager()
 
@@ -75,22 +79,71 @@ class UserAccount(AbstractUser, PermissionsMixin):
             self.save()
 
     def set_image(self, new_image):
-        """Set a new user image and delete old if it not a default"""
-        if self.image:
-            old_avatar_path = self.image.path
-            old_avatar_name = self.image.name.split('/')[1]
-            if is_not_default_pic(old_avatar_name):
-                os.remove(old_avatar_path)
-
-        self.image = new_image
+        """
+        Set a new user image and delete old if it not a default.
+        Image is validated, stripped of metadata and re-encoded,
+        thumbnails generation and old files deletion are background jobs
+        """
+        processed_image = process_image(new_image)
+        old_avatar_name = self.image.name if self.image else None
+
+        self.image = processed_image
         self.save()
+        generate_image_thumbnails.delay(name=self.image.name)
+
+        if old_avatar_name and is_not_default_pic(os.path.splitext(old_avatar_name)[0]):
+            # old files are kept until the new image is committed, so a failed save doesn't leave user without avatar
+            transaction.on_commit(lambda: delete_image_files.delay(name=old_avatar_name))
 
     def get_image(self):
         """Get user image"""
         return self.image
 
+    def toggle_follow(self, user):
+        """Following user if not followed yet or unfollowing, returns message and followers count of user"""
+        user_queryset = UserAccount.objects.filter(pk=user.pk)
+        with transaction.atomic():
+            # objects are deleted one by one, so timeline of follower is cleaned by post_delete signal
+            deleted, _ = Follow.objects.filter(follower=self, following=user).delete()
+            if deleted:
+                delta = -1
+                message = 'unfollowed'
+            else:
+                try:
+                    with transaction.atomic():
+                        Follow.objects.create(follower=self, following=user)
+                    delta = 1
+                except IntegrityError:
+                    # concurrent request has already followed
+                    delta = 0
+                message = 'followed'
+
+            if delta:
+                user_queryset.update(followers_count=F('followers_count') + delta)
+            user.followers_count = user_queryset.values_list('followers_count', flat=True).get()
+
+        return message, user.followers_count
+
     def get_full_name(self):
         return self.name
 
     def get_short_name(self):
         return self.name
+
+
+class Follow(models.Model):
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['follower', 'following'], name='unique_follow'),
+        ]
+        indexes = [
+            # followers of user, in order of fan-out batches
+            models.Index(fields=['following', 'follower'], name='follow_followers_idx'),
+        ]
+
+    follower = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='following_set')
+    following = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='follower_set')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Follow({self.follower_id} -> {self.following_id})"
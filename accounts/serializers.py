@@ -1,11 +1,19 @@
 from djoser.serializers import UserCreateSerializer
+from rest_framework import serializers
 from django.contrib.auth import get_user_model
 
+from app.images import get_thumbnail_urls
+
 
 User = get_user_model()
 
 
 class CustomUserCreateSerializer(UserCreateSerializer):
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta(UserCreateSerializer.Meta):
         model = User
-        fields = ('id', 'email', 'name', 'password', 'image')
+        fields = ('id', 'email', 'name', 'password', 'image', 'thumbnails')
+
+    def get_thumbnails(self, obj) -> dict:
+        return get_thumbnail_urls(obj.image, self.context.get('request'))
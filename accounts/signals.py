@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from accounts.authentication import invalidate_cached_user
+from accounts.models import UserAccount
+
+
+@receiver([post_save, post_delete], sender=UserAccount)
+def invalidate_authentication_cache(sender, instance, **kwargs):
+    """Drop cached user after username, avatar, activity or any other change"""
+    invalidate_cached_user(instance.pk)
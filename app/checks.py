@@ -0,0 +1,58 @@
+import django
+from django.conf import settings
+from django.core.checks import Info, Warning, register
+
+
+@register('database_connections')
+def check_database_connections(app_configs, **kwargs):
+    """Warn about connection settings which are not applied"""
+    database = settings.DATABASES['default']
+    if 'postgresql' not in database['ENGINE'] or not settings.DB_POOL or 'pool' in database.get('OPTIONS', {}):
+        return []
+
+    if django.VERSION < (5, 1):
+        reason = f'Django {django.get_version()} has no connection pooling, it is added in 5.1'
+    else:
+        reason = 'psycopg 3 with pool is not installed (pip install "psycopg[pool]")'
+    return [Warning(
+        f'DB_POOL is enabled, but {reason}.',
+        hint=f'Persistent connections are used instead (CONN_MAX_AGE={database["CONN_MAX_AGE"]}), '
+             'or use external pooler like PgBouncer.',
+        id='app.W001',
+    )]
+
+
+@register('database_connections', deploy=True)
+def report_database_connections(app_configs, **kwargs):
+    """Report effective connection management of default database"""
+    database = settings.DATABASES['default']
+    options = database.get('OPTIONS', {})
+    messages = []
+
+    if 'pool' in options:
+        pool = options['pool']
+        connections = f'pool of {pool["min_size"]}-{pool["max_size"]} connections per worker'
+    elif database['CONN_MAX_AGE']:
+        connections = f'persistent connections for {database["CONN_MAX_AGE"]} seconds'
+    else:
+        connections = 'new connection for every request'
+    health_checks = 'with' if database['CONN_HEALTH_CHECKS'] else 'without'
+    messages.append(Info(
+        f'Database {database["ENGINE"].rsplit(".", 1)[-1]}: {connections}, {health_checks} health checks, '
+        f'statement timeout {settings.DB_STATEMENT_TIMEOUT or "off"}.',
+        id='app.I001',
+    ))
+
+    if 'postgresql' in database['ENGINE'] and not settings.DB_STATEMENT_TIMEOUT:
+        messages.append(Warning(
+            'PostgreSQL statements have no time limit.',
+            hint='Set DB_STATEMENT_TIMEOUT (milliseconds), so slow queries do not hold workers and connections.',
+            id='app.W002',
+        ))
+    if 'postgresql' in database['ENGINE'] and not database['CONN_MAX_AGE'] and 'pool' not in options:
+        messages.append(Warning(
+            'Connection to PostgreSQL is opened for every request.',
+            hint='Set DB_CONN_MAX_AGE or DB_POOL.',
+            id='app.W003',
+        ))
+    return messages
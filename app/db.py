@@ -0,0 +1,31 @@
+from django.contrib.postgres.indexes import PostgresIndex
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db.migrations import AddIndex
+
+
+class AddIndexConcurrentlyIfSupported(AddIndexConcurrently):
+    """
+    Migration operation creating index with 'CREATE INDEX CONCURRENTLY' on PostgreSQL,
+    so big tables are not locked for writes while index is built.
+    Other databases get ordinary 'CREATE INDEX', PostgreSQL specific indexes (GIN, GiST, ...) are skipped on them.
+    Migration using it must be non-atomic.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+        if not isinstance(self.index, PostgresIndex):
+            return AddIndex.database_forwards(self, app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+        if not isinstance(self.index, PostgresIndex):
+            return AddIndex.database_backwards(self, app_label, schema_editor, from_state, to_state)
+        # skipped index is still in model state, so it is created as ordinary index by later table rebuilds
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            with schema_editor.connection.cursor() as cursor:
+                constraints = schema_editor.connection.introspection.get_constraints(cursor, model._meta.db_table)
+            if self.index.name in constraints:
+                schema_editor.remove_index(model, self.index)
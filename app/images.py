@@ -0,0 +1,90 @@
+import os
+from io import BytesIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+
+
+def _open_image(file) -> Image.Image:
+    """Open and fully decode image, so broken and non image files are rejected"""
+    try:
+        file.seek(0)
+        image = Image.open(file)
+        image.load()
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError):
+        raise ValidationError('Upload a valid image. The file you uploaded was either not an image or corrupted.')
+
+    # rotate pixels as camera wanted, orientation is stored in metadata which is not kept
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    return image
+
+
+def _encode(image: Image.Image) -> bytes:
+    """Encode image to IMAGE_FORMAT, without metadata (EXIF, ICC, comments)"""
+    image.info = {}
+    buffer = BytesIO()
+    image.save(buffer, format=settings.IMAGE_FORMAT, quality=settings.IMAGE_QUALITY)
+    return buffer.getvalue()
+
+
+def get_image_extension() -> str:
+    return settings.IMAGE_FORMAT.lower()
+
+
+def process_image(file) -> ContentFile:
+    """
+    Validate uploaded image, strip metadata and re-encode it to IMAGE_FORMAT,
+    image is downscaled to IMAGE_MAX_SIZE if it is bigger
+    """
+    image = _open_image(file)
+    image.thumbnail((settings.IMAGE_MAX_SIZE, settings.IMAGE_MAX_SIZE))
+    name = os.path.splitext(os.path.basename(file.name or 'image'))[0]
+    return ContentFile(_encode(image), name=f'{name}.{get_image_extension()}')
+
+
+def get_thumbnail_name(name: str, size_name: str) -> str:
+    """
+    Name of image thumbnail in storage:
+    profile_images/<uuid>.webp -> profile_images/<uuid>_small.webp
+    """
+    root, _ = os.path.splitext(name)
+    return f'{root}_{size_name}.{get_image_extension()}'
+
+
+def generate_thumbnails(storage, name: str, overwrite: bool = True) -> list:
+    """Create thumbnail of stored image for every size of IMAGE_THUMBNAIL_SIZES, returns created names"""
+    with storage.open(name, 'rb') as file:
+        image = _open_image(file)
+
+    created = []
+    for size_name, size in settings.IMAGE_THUMBNAIL_SIZES.items():
+        thumbnail_name = get_thumbnail_name(name, size_name)
+        if storage.exists(thumbnail_name):
+            if not overwrite:
+                continue
+            storage.delete(thumbnail_name)
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        created.append(storage.save(thumbnail_name, ContentFile(_encode(thumbnail))))
+    return created
+
+
+def delete_thumbnails(storage, name: str):
+    for size_name in settings.IMAGE_THUMBNAIL_SIZES:
+        storage.delete(get_thumbnail_name(name, size_name))
+
+
+def get_thumbnail_urls(field_file, request=None) -> dict:
+    """Urls of image thumbnails by size name, absolute if request is given"""
+    if not field_file:
+        return {}
+    urls = {}
+    for size_name in settings.IMAGE_THUMBNAIL_SIZES:
+        url = field_file.storage.url(get_thumbnail_name(field_file.name, size_name))
+        urls[size_name] = request.build_absolute_uri(url) if request is not None else url
+    return urls
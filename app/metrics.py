@@ -0,0 +1,269 @@
+import atexit
+import bisect
+import fcntl
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# seconds, buckets of latency histograms
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metric:
+    """Counter or histogram with fixed label names, values are kept by MetricsRegistry"""
+
+    def __init__(self, registry, kind, name, documentation, labels=(), buckets=None):
+        self.registry = registry
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) if buckets else None
+
+    def inc(self, *labels, amount=1):
+        """Increase counter of label values"""
+        values = self.registry.get_shard()
+        key = (self.name, labels, None)
+        values[key] = values.get(key, 0) + amount
+
+    def observe(self, value, *labels):
+        """Count value in histogram of label values"""
+        values = self.registry.get_shard()
+        # index of the first bucket which upper bound is >= value, len(buckets) is +Inf bucket
+        bucket = (self.name, labels, bisect.bisect_left(self.buckets, value))
+        values[bucket] = values.get(bucket, 0) + 1
+        total = (self.name, labels, 'sum')
+        values[total] = values.get(total, 0) + value
+
+
+class MetricsRegistry:
+    """
+    Counters and histograms of process, rendered in Prometheus text format.
+    Hot paths don't take locks: every thread increments its own dict (shard), shards are summed on collection.
+    With METRICS_DIR every worker process writes its values to '<METRICS_DIR>/metrics_<pid>.json'
+    every METRICS_FLUSH_INTERVAL seconds, any worker answering scrape sums files of all workers.
+    Files of stopped workers are merged into 'metrics_archive.json', so counters never go back.
+    """
+    archive_name = 'metrics_archive.json'
+
+    def __init__(self):
+        self.metrics = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._thread = None
+        self._stop = threading.Event()
+        # forked worker starts from zero, values of parent process are its own
+        os.register_at_fork(after_in_child=self._reset)
+
+    def counter(self, name, documentation, labels=()) -> Metric:
+        return self._register(Metric(self, 'counter', name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS) -> Metric:
+        return self._register(Metric(self, 'histogram', name, documentation, labels, buckets))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f'metric {metric.name} is already registered')
+        self.metrics[metric.name] = metric
+        return metric
+
+    def get_shard(self) -> dict:
+        """Values dict of current thread"""
+        try:
+            return self._local.values
+        except AttributeError:
+            pass
+        with self._lock:
+            values = self._local.values = {}
+            self._shards.append(values)
+        self._ensure_writer()
+        return values
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._shards = []
+        self._thread = None
+
+    def collect(self) -> dict:
+        """Sum of values of all threads of process"""
+        with self._lock:
+            shards = list(self._shards)
+        total = defaultdict(int)
+        for shard in shards:
+            # copy of dict is atomic, while iteration over dict changed by other thread is not
+            for key, value in shard.copy().items():
+                total[key] += value
+        return total
+
+    def collect_all(self) -> dict:
+        """Sum of values of all worker processes, or of current process without METRICS_DIR"""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return self.collect()
+        self.write()
+        with self._directory_lock(directory):
+            self._archive_stopped(directory)
+            total = defaultdict(int)
+            for name in os.listdir(directory):
+                if name.startswith('metrics_') and name.endswith('.json'):
+                    for key, value in self._read(os.path.join(directory, name)).items():
+                        total[key] += value
+        return total
+
+    def write(self):
+        """Write values of current process to its file in METRICS_DIR"""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        self._dump(path, self.collect())
+
+    def render(self) -> str:
+        """Values of all workers in Prometheus text exposition format"""
+        values = defaultdict(dict)
+        for (name, labels, index), value in self.collect_all().items():
+            values[name].setdefault(tuple(labels), {})[index] = value
+
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for labels, series in sorted(values.get(name, {}).items()):
+                label_pairs = [f'{label}="{escape(value)}"' for label, value in zip(metric.labels, labels)]
+                if metric.kind == 'counter':
+                    lines.append(f'{name}{format_labels(label_pairs)} {series.get(None, 0)}')
+                    continue
+                cumulative = 0
+                for index, bound in enumerate((*metric.buckets, '+Inf')):
+                    cumulative += series.get(index, 0)
+                    bucket_labels = format_labels([*label_pairs, f'le="{bound}"'])
+                    lines.append(f'{name}_bucket{bucket_labels} {cumulative}')
+                lines.append(f'{name}_sum{format_labels(label_pairs)} {series.get("sum", 0)}')
+                lines.append(f'{name}_count{format_labels(label_pairs)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def _ensure_writer(self):
+        """Start background writer thread in current process, if values are shared by workers"""
+        interval = settings.METRICS_FLUSH_INTERVAL
+        if not settings.METRICS_DIR or not interval:
+            return
+        with self._lock:
+            # threads do not survive fork, so every worker process starts its own
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='metrics-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.write()
+            except Exception:
+                logger.exception('metrics write failed')
+
+    def write_at_exit(self):
+        """Write values of process when it is stopping, so they are not lost on worker restart"""
+        self._stop.set()
+        try:
+            self.write()
+        except Exception:
+            logger.exception('metrics write at exit failed')
+
+    def _archive_stopped(self, directory):
+        """Merge files of stopped workers into archive file, so directory doesn't grow with worker restarts"""
+        archive_path = os.path.join(directory, self.archive_name)
+        archive = None
+        for name in os.listdir(directory):
+            pid = name[len('metrics_'):-len('.json')]
+            if not (name.startswith('metrics_') and name.endswith('.json') and pid.isdigit()) or is_running(int(pid)):
+                continue
+            if archive is None:
+                archive = defaultdict(int, self._read(archive_path))
+            path = os.path.join(directory, name)
+            for key, value in self._read(path).items():
+                archive[key] += value
+            self._dump(archive_path, archive)
+            os.remove(path)
+
+    @staticmethod
+    def _dump(path, values):
+        with open(f'{path}.tmp', 'w') as file:
+            json.dump([[name, list(labels), index, value] for (name, labels, index), value in values.items()], file)
+        # readers never see partly written file
+        os.replace(f'{path}.tmp', path)
+
+    @staticmethod
+    def _read(path) -> dict:
+        try:
+            with open(path) as file:
+                rows = json.load(file)
+        except FileNotFoundError:
+            return {}
+        return {(name, tuple(labels), index): value for name, labels, index, value in rows}
+
+    @staticmethod
+    def _directory_lock(directory):
+        """Exclusive lock of METRICS_DIR between processes merging files"""
+        return FileLock(os.path.join(directory, 'metrics.lock'))
+
+
+class FileLock:
+    def __init__(self, path):
+        self.path = path
+
+    def __enter__(self):
+        self.file = open(self.path, 'w')
+        fcntl.flock(self.file, fcntl.LOCK_EX)
+
+    def __exit__(self, *exc_info):
+        fcntl.flock(self.file, fcntl.LOCK_UN)
+        self.file.close()
+
+
+def is_running(pid) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def format_labels(label_pairs) -> str:
+    return '{' + ','.join(label_pairs) + '}' if label_pairs else ''
+
+
+registry = MetricsRegistry()
+atexit.register(registry.write_at_exit)
+
+REQUESTS = registry.counter('http_requests_total', 'Requests by view, method and status.', ('view', 'method', 'status'))
+LATENCY = registry.histogram('http_request_duration_seconds', 'Duration of requests by view.', ('view', 'method'))
+LIKES = registry.counter('likes_total', 'Like toggles by model and result.', ('model', 'result'))
+VIEWS = registry.counter('views_total', 'Views added by model.', ('model',))
+THROTTLED = registry.counter('throttled_requests_total', 'Requests rejected by throttling, by scope.', ('scope',))
+RESPONSE_CACHE = registry.counter(
+    'response_cache_requests_total', 'Lookups of cached responses by result (hit, miss).', ('result',)
+)
+DB_CONNECTIONS = registry.counter(
+    'db_connections_opened_total', 'New database connections, low with persistent connections.', ('alias',)
+)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS.inc(connection.alias)
@@ -8,4 +8,5 @@ class IsOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
-        return obj.user == request.user
+        # comparing ids doesn't load owner from database
+        return obj.user_id == request.user.id
@@ -1,8 +1,11 @@
 import os
 from datetime import timedelta
+from importlib.util import find_spec
 
 from pathlib import Path
 
+import django
+
 SECRET_KEY = os.getenv('SECRET_KEY')
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -24,12 +27,16 @@ INSTALLED_APPS = [
     'accounts',
     'posts',
     'security',
+    'jobs',
     'corsheaders',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True
 
 MIDDLEWARE = [
+    # first, so profiled time includes other middlewares, removed from chain when QUERY_PROFILING is off
+    'security.middlewares.QueryProfilingMiddleware',
+    'security.middlewares.MetricsMiddleware',
     'social_django.middleware.SocialAuthExceptionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -40,6 +47,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'security.middlewares.RemoveServerHeaderMiddleware',
+    'security.middlewares.RateLimitHeadersMiddleware',
 ]
 
 ROOT_URLCONF = 'app.urls'
@@ -70,9 +78,53 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD', default=''),
         'HOST': os.getenv('DB_HOST', default=''),
         'PORT': os.getenv('DB_PORT', default=''),
+        # connection is kept open between requests of worker, and checked before reuse
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),  # seconds, 0 closes connection after every request
+        'CONN_HEALTH_CHECKS': os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     }
 }
 
+# PostgreSQL connection options, effective configuration is reported by 'manage.py check --deploy'
+DB_CONNECT_TIMEOUT = int(os.getenv('DB_CONNECT_TIMEOUT', 5))  # seconds
+DB_STATEMENT_TIMEOUT = int(os.getenv('DB_STATEMENT_TIMEOUT', 0))  # milliseconds, 0 - no limit
+# Connection pool of worker process, requires Django 5.1+ and psycopg 3 ('pip install "psycopg[pool]"'),
+# otherwise persistent connections are used, see app.checks
+DB_POOL = os.getenv('DB_POOL', 'False') == 'True'
+DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))  # seconds of waiting for free connection
+
+if 'postgresql' in DATABASES['default']['ENGINE']:
+    DATABASES['default']['OPTIONS'] = {'connect_timeout': DB_CONNECT_TIMEOUT}
+    if DB_STATEMENT_TIMEOUT:
+        DATABASES['default']['OPTIONS']['options'] = f'-c statement_timeout={DB_STATEMENT_TIMEOUT}'
+    if DB_POOL and django.VERSION >= (5, 1) and find_spec('psycopg_pool') is not None:
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': DB_POOL_MIN_SIZE,
+            'max_size': DB_POOL_MAX_SIZE,
+            'timeout': DB_POOL_TIMEOUT,
+        }
+        # pooled connections are returned to pool after every request instead
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Hasher of new passwords: 'scrypt', 'argon2' (requires 'pip install argon2-cffi') or 'pbkdf2'.
+# Other hashers only verify existing passwords, which are rehashed by preferred one on successful login,
+# see security.checks
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'scrypt')
+PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'pbkdf2_sha1': 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+}
+_password_hasher = PASSWORD_HASHER if PASSWORD_HASHER in PASSWORD_HASHER_CLASSES else 'scrypt'
+if _password_hasher == 'argon2' and find_spec('argon2') is None:
+    _password_hasher = 'scrypt'
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[_password_hasher],
+    *(hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != _password_hasher),
+]
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -100,21 +152,91 @@ USE_TZ = True
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # sliding window counters on THROTTLE_CACHE_ALIAS cache, see app.throttling
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle'
+        'app.throttling.AnonRateThrottle',
+        'app.throttling.UserRateThrottle',
+        'app.throttling.ScopedRateThrottle',
     ],
     'DEFAULT_THROTTLE_RATES': {
-        'anon': '600/second'
+        'anon': os.getenv('THROTTLE_ANON_RATE', '600/second'),  # per IP address
+        'user': os.getenv('THROTTLE_USER_RATE', '600/second'),  # per user
+        # writes of endpoints with 'throttle_scope', per user or IP address
+        'like': os.getenv('THROTTLE_LIKE_RATE', '60/minute'),
+        'views': os.getenv('THROTTLE_VIEWS_RATE', '120/minute'),
+        'avatar': os.getenv('THROTTLE_AVATAR_RATE', '10/hour'),
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
+# Redis shares cache between workers and servers, requires 'redis' package
+if os.getenv('REDIS_URL'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL'),
+    }
+
+# Responses of read-only endpoints for anonymous users, see posts.cache
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = int(os.getenv('RESPONSE_CACHE_TIMEOUT', 60))  # seconds, 0 - responses are not cached
+
+# Request counters of throttling, must be shared by workers (REDIS_URL) for limits to hold, see app.throttling
+THROTTLE_CACHE_ALIAS = 'default'
+
+# Users of authenticated requests, must be shared by workers (REDIS_URL) for deactivation to apply at once,
+# see accounts.authentication
+AUTH_USER_CACHE_ALIAS = 'default'
+AUTH_USER_CACHE_TIMEOUT = int(os.getenv('AUTH_USER_CACHE_TIMEOUT', 60))  # seconds, 0 - users are not cached
+# Build user from token claims without lookup for GET, HEAD and OPTIONS requests
+AUTH_TOKEN_USER_FOR_READS = os.getenv('AUTH_TOKEN_USER_FOR_READS', 'False') == 'True'
+
+# Views counters are buffered in every worker and written to database in batches
+VIEWS_FLUSH_INTERVAL = int(os.getenv('VIEWS_FLUSH_INTERVAL', 5))  # seconds, 0 disables background flushing
+VIEWS_FLUSH_THRESHOLD = int(os.getenv('VIEWS_FLUSH_THRESHOLD', 1000))  # objects in buffer to flush at once
+
+# Profiling of requests, see security.middlewares.QueryProfilingMiddleware and 'manage.py profiling_report'
+QUERY_PROFILING = os.getenv('QUERY_PROFILING', 'False') == 'True'
+QUERY_PROFILING_SAMPLE_RATE = float(os.getenv('QUERY_PROFILING_SAMPLE_RATE', 1.0))  # share of profiled requests
+QUERY_PROFILING_REPEATED_QUERIES = 5  # executions of identical SQL in one request logged as N+1 queries
+QUERY_PROFILING_FILE = os.getenv('QUERY_PROFILING_FILE', 'profiling.jsonl')  # records of requests, '' - don't write
+
+# Metrics of requests, likes, views, throttling, caches and connections at /metrics/, see app.metrics
+# per-view traffic is not public, enable with METRICS_TOKEN, see security.checks
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'False') == 'True'
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')  # required 'Authorization: Bearer <token>' of scrapes, '' - open
+# directory shared by worker processes, metrics of all workers are summed from it, '' - metrics of one process
+METRICS_DIR = os.getenv('METRICS_DIR', '')
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', 10))  # seconds between writes of worker metrics
+
+LIKED_LOOKUP_MAX_IDS = 100  # ids in one request of like state lookup (<route_name>/liked/)
+
+# Hot feed ranking, see posts.ranking
+HOT_SCORE_WEIGHTS = {'like_counter': 1, 'comment_count': 2, 'views': 0.1}
+HOT_SCORE_DECAY = int(os.getenv('HOT_SCORE_DECAY', 45000))  # seconds, newer post needs 10 times less engagement
+
+# Full-text search, see posts.search
+SEARCH_CONFIG = os.getenv('SEARCH_CONFIG', 'english')  # PostgreSQL text search configuration
+SEARCH_MAX_PAGE = 50  # ranked results are not paged deeper
+# characters of comments indexed per post, tsvector of PostgreSQL is limited to 1 MB
+SEARCH_COMMENTS_MAX_LENGTH = int(os.getenv('SEARCH_COMMENTS_MAX_LENGTH', 100000))
+
+# Home timelines, see posts.timeline
+TIMELINE_FANOUT_LIMIT = int(os.getenv('TIMELINE_FANOUT_LIMIT', 10000))  # followers, more are merged on read
+TIMELINE_FANOUT_BATCH = 1000  # timelines written by one job
+TIMELINE_BACKFILL = 50  # latest posts of followed user put into timeline
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.UserAccount'
@@ -134,6 +256,28 @@ DEFAULT_PROFILE_PICS = [
     os.path.join('default_images', 'pic5'),
 ]
 
+# Background jobs, see jobs.queue
+JOBS_ALWAYS_EAGER = False  # do jobs immediately in current process, without worker
+JOBS_MAX_ATTEMPTS = 5
+JOBS_RETRY_DELAY = 10  # seconds, doubled after every failed attempt
+JOBS_LOCK_TIMEOUT = 600  # seconds, running jobs of crashed workers are returned to queue after it
+JOBS_POLL_INTERVAL = 1  # seconds, worker sleeps when queue is empty
+
+# Uploaded images are re-encoded without metadata and get thumbnails, see app.images
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 80
+IMAGE_MAX_SIZE = 2048  # px, bigger images are downscaled
+IMAGE_THUMBNAIL_SIZES = {
+    'small': 128,
+    'medium': 512,
+    'large': 1024,
+}
+
+# Files like avatars can be sent by front proxy instead of python workers:
+# 'X-Accel-Redirect' (nginx, internal location FILE_SENDFILE_PREFIX mapped to MEDIA_ROOT) or 'X-Sendfile' (apache)
+FILE_SENDFILE_HEADER = os.getenv('FILE_SENDFILE_HEADER')
+FILE_SENDFILE_PREFIX = os.getenv('FILE_SENDFILE_PREFIX', '/protected-media/')
+
 STATIC_URL = 'static/'
 
 STATICFILES_DIRS = [
@@ -147,7 +291,9 @@ AUTHENTICATION_BACKENDS = (
     'django.contrib.auth.backends.ModelBackend',
 )
 
-EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+# Emails are sent by jobs worker (python manage.py run_jobs) with QUEUED_EMAIL_BACKEND
+EMAIL_BACKEND = 'jobs.backends.QueuedEmailBackend'
+QUEUED_EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'
 EMAIL_PORT = 587
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
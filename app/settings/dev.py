@@ -4,3 +4,9 @@ DEBUG = True
 ALLOWED_HOSTS = ['*']
 
 SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'] = timedelta(hours=999)
+
+# no need to run jobs worker in development
+JOBS_ALWAYS_EAGER = True
+
+# metrics are open in development, production enables them with METRICS_TOKEN
+METRICS_ENABLED = True
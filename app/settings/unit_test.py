@@ -6,3 +6,10 @@ DATABASES = {
        'NAME': ':memory:',  # in-memory SQLite
    }
 }
+
+# tests flush views buffer by themselves
+VIEWS_FLUSH_INTERVAL = 0
+
+# users of tests are created and logged in many times, secure hashers take ~0.1s per password,
+# rehashing on login is tested with PASSWORD_HASHERS overridden
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
@@ -0,0 +1,109 @@
+import math
+
+from rest_framework import throttling
+from rest_framework.permissions import SAFE_METHODS
+
+from django.conf import settings
+from django.core.cache import caches
+
+from app.metrics import THROTTLED
+
+
+class SlidingWindowThrottleMixin:
+    """
+    Sliding window counter on shared cache (THROTTLE_CACHE_ALIAS), so limits hold across workers and servers.
+    Client has one integer counter per window of rate duration, requests of last 'duration' seconds are estimated
+    from current window counter and weighted counter of previous window:
+
+        requests = previous * (1 - elapsed / duration) + current
+
+    Check is constant number of cache operations, no matter how many requests rate allows,
+    unlike list of timestamps of SimpleRateThrottle. Quota of the most restrictive throttle of request
+    is put to response headers by security.middlewares.RateLimitHeadersMiddleware.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE_ALIAS]
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        now = self.timer()
+        window, elapsed = divmod(now, self.duration)
+        current_key = f'{self.key}:{int(window)}'
+        # counter lives for two windows, it is previous window of the next one
+        if self.cache.add(current_key, 1, self.duration * 2):
+            current = 1
+        else:
+            try:
+                current = self.cache.incr(current_key)
+            except ValueError:
+                # counter expired between add and incr
+                self.cache.set(current_key, 1, self.duration * 2)
+                current = 1
+        previous = self.cache.get(f'{self.key}:{int(window) - 1}', 0)
+
+        self.previous, self.current, self.elapsed = previous, current, elapsed
+        requests = previous * (1 - elapsed / self.duration) + current
+        self.set_quota(request, max(0, math.floor(self.num_requests - requests)))
+        # denied requests are counted too, so client retrying at once stays limited
+        if requests > self.num_requests:
+            THROTTLED.inc(self.scope)
+            return False
+        return True
+
+    def wait(self):
+        """Seconds until estimated requests of window drop below limit"""
+        duration, limit = self.duration, self.num_requests
+        if self.current < limit and self.previous:
+            # weight of previous window decreases while current window goes
+            return max(0.0, duration * (1 - (limit - self.current) / self.previous) - self.elapsed)
+        # counter of current window becomes previous one in the next window
+        return duration - self.elapsed + duration * max(0.0, 1 - limit / self.current)
+
+    def set_quota(self, request, remaining):
+        """Keep quota of request if it is more restrictive than quota of previous throttles"""
+        quota = getattr(request._request, 'rate_limit', None)
+        if quota is None or remaining < quota['remaining']:
+            request._request.rate_limit = {
+                'limit': self.num_requests,
+                'remaining': remaining,
+                'reset': math.ceil(self.duration - self.elapsed),
+            }
+
+
+class AnonRateThrottle(SlidingWindowThrottleMixin, throttling.AnonRateThrottle):
+    """Limits anonymous requests by IP address, 'anon' rate"""
+
+
+class UserRateThrottle(SlidingWindowThrottleMixin, throttling.UserRateThrottle):
+    """Limits authenticated requests by user, 'user' rate"""
+
+    def get_cache_key(self, request, view):
+        if not request.user or not request.user.is_authenticated:
+            # anonymous requests are limited by AnonRateThrottle
+            return None
+        return super().get_cache_key(request, view)
+
+
+class ScopedRateThrottle(SlidingWindowThrottleMixin, throttling.ScopedRateThrottle):
+    """
+    Limits requests of endpoint by user or IP address, rate of 'throttle_scope' of view or action:
+
+        @action(detail=True, methods=['post'], throttle_scope='like')
+
+    Scopes limit writes, reads of endpoint are limited by anon and user rates only.
+    """
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope or request.method in SAFE_METHODS:
+            return True
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
@@ -1,8 +1,13 @@
 from django.urls import path, include
 
+from security.views import liveness, readiness, metrics
+
 urlpatterns = [
     path('auth/', include('djoser.urls')),
     path('auth/', include('djoser.urls.jwt')),
     path('auth/', include('djoser.social.urls')),
     path('api/v1/', include('posts.urls')),
+    path('health/live/', liveness, name='health-live'),
+    path('health/ready/', readiness, name='health-ready'),
+    path('metrics/', metrics, name='metrics'),
 ]
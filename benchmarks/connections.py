@@ -0,0 +1,78 @@
+"""
+Shows requests per second of API with connection per request, persistent connections and connection pool.
+Runs requests in process with Django test client on a fresh test PostgreSQL database (DB_* env),
+every request ends with closing of connection exactly as under gunicorn.
+
+DB_ENGINE=django.db.backends.postgresql DB_NAME=... python -m benchmarks.connections --requests 2000
+"""
+import argparse
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='requests in every mode')
+    parser.add_argument('--url', default='/api/v1/posts/?compact=true')
+    return parser.parse_args()
+
+
+def get_modes():
+    """Connection settings of default database for every mode"""
+    import django
+    from importlib.util import find_spec
+
+    modes = {
+        'connection per request': {'CONN_MAX_AGE': 0},
+        'persistent connections': {'CONN_MAX_AGE': 60, 'CONN_HEALTH_CHECKS': True},
+    }
+    if django.VERSION >= (5, 1) and find_spec('psycopg_pool') is not None:
+        modes['connection pool'] = {'CONN_MAX_AGE': 0, 'OPTIONS': {'pool': {'min_size': 1, 'max_size': 2}}}
+    return modes
+
+
+def run(url, requests):
+    """Requests per second of url"""
+    from django.test import Client
+    from django.test.utils import override_settings
+
+    client = Client()
+    # responses of anonymous requests are cached, only connection and query costs are measured
+    with override_settings(RESPONSE_CACHE_TIMEOUT=0):
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+        return requests / (time.perf_counter() - started)
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings.dev')
+
+    import django
+    django.setup()
+
+    from django.db import connection, connections
+
+    if connection.vendor != 'postgresql':
+        raise SystemExit('PostgreSQL database is required, set DB_ENGINE and DB_* env')
+
+    default_settings = dict(connection.settings_dict)
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        for name, mode in get_modes().items():
+            connection.close()
+            connection.settings_dict.update({**default_settings, 'NAME': connection.settings_dict['NAME'], **mode})
+            if hasattr(connection, 'close_pool'):
+                connection.close_pool()
+            rate = run(args.url, args.requests)
+            print(f'{name}: {rate:.0f} requests/sec')
+    finally:
+        connections.close_all()
+        connection.settings_dict.update({**default_settings, 'NAME': connection.settings_dict['NAME']})
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+"""
+Shows login throughput of password hashers: verifications per second of stored password
+and logins per second of 'auth/jwt/create/' through Django test client on a test database.
+Argon2 is measured when argon2-cffi is installed, MD5 of test settings is shown for reference.
+Throughput of one process is CPU-bound, so workers on the same CPUs divide it.
+
+python -m benchmarks.hashers --logins 20
+"""
+import argparse
+import os
+import time
+
+HASHERS = {
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'md5': 'django.contrib.auth.hashers.MD5PasswordHasher',
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hashers', nargs='+', choices=HASHERS, default=list(HASHERS))
+    parser.add_argument('--checks', type=int, default=20, help='password verifications of every hasher')
+    parser.add_argument('--logins', type=int, default=20, help='login requests of every hasher')
+    return parser.parse_args()
+
+
+def verify(hasher, checks) -> float:
+    """Verifications per second of one stored password"""
+    encoded = hasher.encode('password123', hasher.salt())
+    started = time.perf_counter()
+    for _ in range(checks):
+        hasher.verify('password123', encoded)
+    return checks / (time.perf_counter() - started)
+
+
+def login(client, user, logins) -> float:
+    """Successful logins per second of user with password hashed by preferred hasher"""
+    from django.urls import reverse
+
+    user.set_password('password123')
+    user.save()
+    data = {'email': user.email, 'password': 'password123'}
+    started = time.perf_counter()
+    for _ in range(logins):
+        response = client.post(reverse('jwt-create'), data)
+        assert response.status_code == 200, response.content
+    return logins / (time.perf_counter() - started)
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings.dev')
+    # logins measure hashing, not rate limits
+    os.environ.setdefault('THROTTLE_ANON_RATE', '1000000/second')
+
+    import django
+    django.setup()
+
+    from importlib.util import find_spec
+
+    from rest_framework.test import APIClient
+
+    from django.contrib.auth.hashers import get_hasher
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from accounts.models import UserAccount
+
+    old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+    try:
+        user = UserAccount.objects.create(email='bench@bench.com', username='bench', is_active=True)
+        client = APIClient()
+        for name in args.hashers:
+            if name == 'argon2' and find_spec('argon2') is None:
+                print(f'{name}: skipped, pip install argon2-cffi')
+                continue
+            with override_settings(PASSWORD_HASHERS=[HASHERS[name]]):
+                checks = verify(get_hasher(), args.checks)
+                logins = login(client, user, args.logins)
+            print(f'{name}: {checks:.1f} verifications/sec, {logins:.1f} logins/sec')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
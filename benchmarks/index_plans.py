@@ -0,0 +1,125 @@
+"""
+Shows query plans and timings of feed queries before and after posts.0003_feed_indexes on seeded data.
+Runs on a fresh test database (in-memory SQLite with default settings, test PostgreSQL database with DB_* env).
+
+python -m benchmarks.index_plans --users 1000 --posts 100000 --comments 50000
+"""
+import argparse
+import os
+import statistics
+import time
+from datetime import date, timedelta
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--posts', type=int, default=100000)
+    parser.add_argument('--comments', type=int, default=50000)
+    parser.add_argument('--runs', type=int, default=20, help='runs of every query for timing')
+    return parser.parse_args()
+
+
+def get_posts_models(migration):
+    """Post and Comment models of posts app state after migration, schema of later migrations is not in database"""
+    from django.db import connection
+    from django.db.migrations.loader import MigrationLoader
+
+    apps = MigrationLoader(connection).project_state(('posts', migration)).apps
+    return apps.get_model('posts', 'Post'), apps.get_model('posts', 'Comment')
+
+
+def seed(users_count, posts_count, comments_count, batch_size=5000):
+    """Fill database with posts spread over days, comments are put into first 100 posts"""
+    from accounts.models import UserAccount
+
+    Post, Comment = get_posts_models('0002_comment_views')
+    users = UserAccount.objects.bulk_create(
+        UserAccount(username=f'user{i}', email=f'user{i}@bench.com', name=f'user{i}', password='!')
+        for i in range(users_count)
+    )
+    day = date(2020, 1, 1)
+    for start in range(0, posts_count, batch_size):
+        posts = Post.objects.bulk_create(
+            Post(user_id=users[i % users_count].pk, title=f'title{i}', content='content')
+            for i in range(start, min(start + batch_size, posts_count))
+        )
+        # created_at of 0002 is auto_now_add, so dates are set after insert, one day per batch
+        Post.objects.filter(pk__in=[post.pk for post in posts]).update(created_at=day)
+        day += timedelta(days=1)
+
+    hot_posts = list(Post.objects.values_list('pk', flat=True)[:100])
+    for start in range(0, comments_count, batch_size):
+        Comment.objects.bulk_create(
+            Comment(user_id=users[i % users_count].pk, user_post_id=hot_posts[i % len(hot_posts)], content='comment')
+            for i in range(start, min(start + batch_size, comments_count))
+        )
+
+
+def get_queries():
+    """Querysets issued by feed, get_by_user and get_by_post pages"""
+    from accounts.models import UserAccount
+
+    # 0003 adds indexes only, so both measured schemas have columns of its models
+    Post, Comment = get_posts_models('0003_feed_indexes')
+    user = UserAccount.objects.order_by('pk').first()
+    post = Comment.objects.values_list('user_post', flat=True).first()
+    middle = Post.objects.order_by('-created_at', '-id')[Post.objects.count() // 2]
+    return {
+        'feed page': Post.objects.order_by('-created_at', '-id')[:11],
+        'deep feed page': Post.objects.filter(created_at__lt=middle.created_at).order_by('-created_at', '-id')[:11],
+        'user posts page': Post.objects.filter(user_id=user.pk).order_by('-created_at', '-id')[:11],
+        'post comments page': Comment.objects.filter(user_post=post).order_by('created_at', 'id')[:11],
+    }
+
+
+def measure(runs):
+    """Print plan and median time of every query"""
+    for name, queryset in get_queries().items():
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append(time.perf_counter() - started)
+        print(f'--- {name}: median {statistics.median(timings) * 1000:.2f} ms')
+        print(queryset.explain())
+
+
+def analyze():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings.unit_test')
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    from django.db import connection
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        call_command('migrate', 'posts', '0002', verbosity=0)
+        print(f'seeding {args.users} users, {args.posts} posts, {args.comments} comments...')
+        seed(args.users, args.posts, args.comments)
+        analyze()
+
+        print('\n===== before posts.0003_feed_indexes =====')
+        measure(args.runs)
+
+        call_command('migrate', 'posts', '0003', verbosity=0)
+        analyze()
+
+        print('\n===== after posts.0003_feed_indexes =====')
+        measure(args.runs)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
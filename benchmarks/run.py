@@ -0,0 +1,286 @@
+"""
+Load test of API on seeded database with scripted workloads:
+feed - authenticated reading of feed and users' posts, likes - like storm on a few hot posts,
+views - burst of anonymous views, avatars - anonymous avatar fetches.
+Database is seeded by posts.seeding.Seeder (as "seed" command does) in a fresh test database
+(temporary SQLite file with default settings, test PostgreSQL database with DB_* env).
+Requests go through Django test client in process, or over HTTP to gunicorn started on the same database.
+Latency percentiles, queries per request (Server-Timing of QueryProfilingMiddleware) and throughput are written
+as JSON, which is compared between commits:
+
+python -m benchmarks.run --scale small --output before.json
+python -m benchmarks.run --scale small --client http --output after.json
+python -m benchmarks.run --compare before.json after.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+SCALES = {
+    'tiny': {'users': 100, 'posts': 1000, 'likes': 10000, 'comments': 1000},
+    'small': {'users': 1000, 'posts': 10000, 'likes': 100000, 'comments': 10000},
+    'medium': {'users': 10000, 'posts': 100000, 'likes': 1000000, 'comments': 100000},
+    'large': {'users': 100000, 'posts': 1000000, 'likes': 10000000, 'comments': 1000000},
+}
+WORKLOADS = ('feed', 'likes', 'views', 'avatars')
+SERVER_TIMING = re.compile(r'db;dur=([\d.]+);desc="(\d+) queries"')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scale', choices=SCALES, default='small', help='sizes of seeded data')
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, help=f'{name} to seed, overrides scale')
+    parser.add_argument('--workloads', nargs='+', choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument('--requests', type=int, default=500, help='requests of every workload')
+    parser.add_argument('--client', choices=('test', 'http'), default='test')
+    parser.add_argument('--concurrency', type=int, default=8, help='concurrent clients of http client')
+    parser.add_argument('--port', type=int, default=8101, help='port of gunicorn of http client')
+    parser.add_argument('--seed', type=int, default=1, help='seed of workloads randomness')
+    parser.add_argument('--output', help='file of JSON results, stdout by default')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'), help='compare two result files')
+    return parser.parse_args()
+
+
+def get_workload(name, rng, requests, user_ids, tokens, posts_count, post_id):
+    """Requests of workload as (method, path, token) tuples"""
+    hot_posts = [post_id(posts_count - 1 - number) for number in range(min(10, posts_count))]
+    if name == 'feed':
+        return [
+            ('GET', '/api/v1/posts/?compact=true&with_liked=true', rng.choice(tokens))
+            if number % 2 else
+            ('GET', f'/api/v1/posts/{rng.choice(user_ids)}/get_by_user/?compact=true', rng.choice(tokens))
+            for number in range(requests)
+        ]
+    if name == 'likes':
+        return [('POST', f'/api/v1/posts/{rng.choice(hot_posts)}/like/', rng.choice(tokens)) for _ in range(requests)]
+    if name == 'views':
+        return [
+            ('POST', f'/api/v1/posts/{post_id(rng.randrange(min(1000, posts_count)))}/views/', None)
+            for _ in range(requests)
+        ]
+    if name == 'avatars':
+        return [('GET', f'/api/v1/users/{rng.choice(user_ids)}/avatar/', None) for _ in range(requests)]
+    raise ValueError(name)
+
+
+class TestClient:
+    """Requests through Django test client in current process"""
+
+    def __init__(self):
+        from django.test import Client
+        self.client = Client()
+
+    def request(self, method, path, token):
+        headers = {'HTTP_AUTHORIZATION': f'JWT {token}'} if token else {}
+        started = time.perf_counter()
+        response = self.client.generic(method, path, **headers)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return time.perf_counter() - started, response.status_code, response.get('Server-Timing', '')
+
+    def run(self, requests):
+        return [self.request(*request) for request in requests]
+
+    def close(self):
+        pass
+
+
+class HttpClient:
+    """Concurrent requests over HTTP to gunicorn started on the same database"""
+
+    def __init__(self, port, concurrency, database):
+        from benchmarks.server_modes import wait_for_server
+
+        self.base_url = f'http://127.0.0.1:{port}'
+        self.concurrency = concurrency
+        env = {**os.environ, 'PORT': str(port), 'DB_NAME': database, 'DJANGO_SETTINGS_MODULE': 'app.settings'}
+        self.server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'], env=env, stderr=subprocess.DEVNULL
+        )
+        wait_for_server(f'{self.base_url}/health/live/')
+
+    def request(self, method, path, token):
+        request = urllib.request.Request(f'{self.base_url}{path}', method=method)
+        if token:
+            request.add_header('Authorization', f'JWT {token}')
+        started = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status, timing = response.status, response.headers.get('Server-Timing', '')
+        except urllib.error.HTTPError as err:
+            status, timing = err.code, err.headers.get('Server-Timing', '')
+        return time.perf_counter() - started, status, timing
+
+    def run(self, requests):
+        with ThreadPoolExecutor(self.concurrency) as executor:
+            return list(executor.map(lambda request: self.request(*request), requests))
+
+    def close(self):
+        self.server.terminate()
+        self.server.wait()
+
+
+def measure(client, requests) -> dict:
+    """Run requests and summarize their latencies, statuses and queries"""
+    client.run(requests[:max(1, len(requests) // 10)])  # warm up caches and connections
+    started = time.perf_counter()
+    results = client.run(requests)
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(latency * 1000 for latency, _, _ in results)
+    statuses = {}
+    queries, db_ms = [], []
+    for _, status, timing in results:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+        match = SERVER_TIMING.search(timing)
+        if match:
+            db_ms.append(float(match.group(1)))
+            queries.append(int(match.group(2)))
+    return {
+        'requests': len(results),
+        'statuses': statuses,
+        'throughput_rps': round(len(results) / elapsed, 1),
+        'latency_ms': {
+            'p50': round(statistics.median(latencies), 2),
+            'p90': round(latencies[int(len(latencies) * 0.9) - 1], 2),
+            'p99': round(latencies[int(len(latencies) * 0.99) - 1], 2),
+            'max': round(latencies[-1], 2),
+        },
+        'queries_per_request': round(statistics.mean(queries), 2) if queries else None,
+        'db_ms_per_request': round(statistics.mean(db_ms), 2) if db_ms else None,
+    }
+
+
+def get_commit() -> str:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True)
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD', '--'], capture_output=True).returncode
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit.stdout.strip() + ('-dirty' if dirty else '')
+
+
+def compare(before_path, after_path):
+    """Print changes of every workload between two result files"""
+    with open(before_path) as before_file, open(after_path) as after_file:
+        before, after = json.load(before_file), json.load(after_file)
+    print(f'{before["meta"]["commit"]} -> {after["meta"]["commit"]}')
+    for name, result in after['workloads'].items():
+        if name not in before['workloads']:
+            continue
+        old = before['workloads'][name]
+        changes = [
+            ('rps', old['throughput_rps'], result['throughput_rps']),
+            ('p50 ms', old['latency_ms']['p50'], result['latency_ms']['p50']),
+            ('p99 ms', old['latency_ms']['p99'], result['latency_ms']['p99']),
+            ('queries', old['queries_per_request'], result['queries_per_request']),
+        ]
+        line = ', '.join(
+            f'{label} {old_value} -> {new_value}'
+            + (f' ({(new_value - old_value) / old_value:+.0%})' if old_value and new_value is not None else '')
+            for label, old_value, new_value in changes
+        )
+        print(f'{name}: {line}')
+
+
+def main():
+    args = parse_args()
+    if args.compare:
+        return compare(*args.compare)
+
+    sizes = {name: getattr(args, name) or size for name, size in SCALES[args.scale].items()}
+    os.environ.setdefault('SECRET_KEY', 'benchmark')
+    os.environ.setdefault('DJANGO_ENV', 'production')
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    # queries and database time of every request are read from Server-Timing header
+    os.environ.update({'QUERY_PROFILING': 'True', 'QUERY_PROFILING_SAMPLE_RATE': '1', 'QUERY_PROFILING_FILE': ''})
+    # workloads measure API, not rate limits
+    for scope in ('ANON', 'USER', 'LIKE', 'VIEWS', 'AVATAR'):
+        os.environ.setdefault(f'THROTTLE_{scope}_RATE', '1000000/second')
+
+    import django
+    django.setup()
+
+    from django.db import connection
+
+    from accounts.models import UserAccount
+    from posts.counters import views_buffer
+    from posts.seeding import Seeder
+
+    directory = tempfile.TemporaryDirectory()
+    if connection.vendor == 'sqlite':
+        # file database is shared with gunicorn of http client
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory.name, 'benchmark.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, serialize=False)
+    client = None
+    try:
+        seeder = Seeder(batch_size=5000)
+        started = time.perf_counter()
+        seeder.seed_users(sizes['users'])
+        seeder.seed_posts(sizes['posts'])
+        seeder.seed_likes(sizes['likes'])
+        seeder.seed_comments(sizes['comments'])
+        seeding_seconds = time.perf_counter() - started
+        print(f'seeded {sizes} in {seeding_seconds:.1f}s', file=sys.stderr)
+
+        users = UserAccount.objects.filter(pk__in=seeder.user_ids[:50])
+        tokens = [user.get_jwt_token_for_user() for user in users]
+        if args.client == 'http':
+            client = HttpClient(args.port, args.concurrency, connection.settings_dict['NAME'])
+        else:
+            client = TestClient()
+
+        workloads = {}
+        for name in args.workloads:
+            rng = random.Random(f'{args.seed}:{name}')
+            requests = get_workload(
+                name, rng, args.requests, seeder.user_ids, tokens, sizes['posts'], seeder.get_post_id
+            )
+            workloads[name] = measure(client, requests)
+            print(f'{name}: {json.dumps(workloads[name])}', file=sys.stderr)
+    finally:
+        if client is not None:
+            client.close()
+        # buffered views are written before database is dropped, not at exit
+        views_buffer.flush()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        directory.cleanup()
+
+    results = {
+        'meta': {
+            'commit': get_commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'client': args.client,
+            'concurrency': args.concurrency if args.client == 'http' else 1,
+            'python': sys.version.split()[0],
+            'django': django.get_version(),
+            'sizes': sizes,
+            'seed': args.seed,
+            'seeding_seconds': round(seeding_seconds, 1),
+        },
+        'workloads': workloads,
+    }
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""
+Shows requests per second and latency of API served by gunicorn.conf.py in every server mode,
+compared with bare 'gunicorn app.wsgi:application' (one sync worker).
+Every mode is started as gunicorn process and loaded by concurrent clients over HTTP.
+Uses database of DB_* env, temporary SQLite database with a few posts is created when DB_NAME is not set.
+
+python -m benchmarks.server_modes --requests 2000 --concurrency 32
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from importlib.util import find_spec
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='requests in every mode')
+    parser.add_argument('--concurrency', type=int, default=32, help='concurrent clients')
+    parser.add_argument('--port', type=int, default=8100)
+    parser.add_argument('--url', default='/api/v1/posts/?compact=true')
+    return parser.parse_args()
+
+
+def get_modes():
+    """Extra environment of gunicorn process for every mode"""
+    modes = {
+        'sync, 1 worker': {'SERVER_MODE': 'wsgi', 'GUNICORN_WORKER_CLASS': 'sync', 'WEB_CONCURRENCY': '1'},
+        'wsgi (gthread)': {'SERVER_MODE': 'wsgi'},
+    }
+    if find_spec('uvicorn_worker') is not None:
+        modes['asgi (uvicorn)'] = {'SERVER_MODE': 'asgi'}
+    else:
+        print('uvicorn-worker is not installed, asgi mode is skipped')
+    return modes
+
+
+def prepare_database(env):
+    """Migrate database of env and create a few posts to list"""
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '-v', '0'], env=env, check=True)
+    script = (
+        'from accounts.models import UserAccount; from posts.models import Post\n'
+        'if not Post.objects.exists():\n'
+        '    user = UserAccount.objects.create_user(email="bench@a.com", username="bench", password="bench")\n'
+        '    Post.objects.bulk_create([Post(user=user, title=f"post {i}", content="text " * 50) for i in range(50)])\n'
+    )
+    subprocess.run([sys.executable, 'manage.py', 'shell', '-c', script], env=env, check=True)
+
+
+def wait_for_server(url, timeout=30):
+    """Wait until server answers"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'server is not started at {url}')
+
+
+def get(url):
+    """Latency of one request in seconds"""
+    started = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=30) as response:
+        response.read()
+        assert response.status == 200, response.status
+    return time.perf_counter() - started
+
+
+def load(url, requests, concurrency):
+    """Requests per second and latencies of concurrent requests to url"""
+    with ThreadPoolExecutor(concurrency) as executor:
+        started = time.perf_counter()
+        latencies = list(executor.map(get, [url] * requests))
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, sorted(latencies)
+
+
+def main():
+    args = parse_args()
+    env = {**os.environ}
+    env.setdefault('DJANGO_ENV', 'production')
+    env.setdefault('SECRET_KEY', 'benchmark')
+    # responses of anonymous requests are cached, server and application costs are measured
+    env['RESPONSE_CACHE_TIMEOUT'] = '0'
+    env['PORT'] = str(args.port)
+
+    with tempfile.TemporaryDirectory() as directory:
+        if not os.getenv('DB_NAME'):
+            env['DB_NAME'] = os.path.join(directory, 'db.sqlite3')
+        prepare_database(env)
+
+        url = f'http://127.0.0.1:{args.port}{args.url}'
+        for name, mode in get_modes().items():
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py'],
+                env={**env, **mode}, stderr=subprocess.DEVNULL,
+            )
+            try:
+                wait_for_server(url)
+                load(url, args.concurrency, args.concurrency)  # warm up every worker
+                rate, latencies = load(url, args.requests, args.concurrency)
+            finally:
+                server.terminate()
+                server.wait()
+            p50 = statistics.median(latencies) * 1000
+            p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+            print(f'{name}: {rate:.0f} requests/sec, p50 {p50:.1f} ms, p99 {p99:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Shows throttle checks per second of DRF list of timestamps (SimpleRateThrottle)
+and sliding window counters (app.throttling) for one client hitting its limit.
+Cost of timestamps grows with allowed requests of rate, cost of counters doesn't.
+Uses default cache, set REDIS_URL to measure shared Redis cache.
+
+python -m benchmarks.throttle --checks 20000
+"""
+import argparse
+import os
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--checks', type=int, default=20000, help='checks of every throttle and rate')
+    parser.add_argument('--rates', nargs='+', default=['60/minute', '1000/minute', '10000/hour'])
+    return parser.parse_args()
+
+
+def run(throttle_class, rate, checks):
+    """Checks per second of throttle with rate, for the same client"""
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from django.core.cache import cache
+
+    cache.clear()
+    request = Request(APIRequestFactory().get('/'))
+    throttle = throttle_class()
+    throttle.rate = rate
+    throttle.num_requests, throttle.duration = throttle.parse_rate(rate)
+
+    started = time.perf_counter()
+    for _ in range(checks):
+        throttle.allow_request(request, None)
+    return checks / (time.perf_counter() - started)
+
+
+def main():
+    args = parse_args()
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings.dev')
+
+    import django
+    django.setup()
+
+    from rest_framework import throttling
+
+    from django.conf import settings
+
+    from app import throttling as sliding
+
+    print(f'cache: {settings.CACHES["default"]["BACKEND"]}')
+    for rate in args.rates:
+        for name, throttle_class in (
+            ('timestamps', throttling.AnonRateThrottle),
+            ('sliding window', sliding.AnonRateThrottle),
+        ):
+            print(f'{rate}, {name}: {run(throttle_class, rate, args.checks):.0f} checks/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,10 @@
 #!/bin/sh
 
-# making migrations
-python manage.py makemigrations accounts
-python manage.py makemigrations posts
+# migrations are committed and applied in release phase by 'manage.py migrate_locked',
+# so replicas boot straight into the server, see /health/ready/ for readiness probe
 
-# migrate
-python manage.py migrate
+# report effective database connections, throttling, caches, password hashing and metrics configuration
+python manage.py check --deploy --tag database_connections --tag throttling --tag passwords --tag metrics --tag caches
 
-# run
-exec gunicorn 'app.wsgi:application'
\ No newline at end of file
+# run, see gunicorn.conf.py for SERVER_MODE and worker settings
+exec gunicorn -c gunicorn.conf.py
\ No newline at end of file
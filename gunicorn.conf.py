@@ -0,0 +1,66 @@
+"""
+Gunicorn configuration, loaded with 'gunicorn -c gunicorn.conf.py'.
+
+SERVER_MODE=wsgi (default) - app.wsgi under threaded (gthread) workers,
+SERVER_MODE=asgi - app.asgi under uvicorn workers (uvicorn-worker package).
+Every value can be overridden with environment variables below, load comparison of modes is in benchmarks.server_modes
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+SERVER_MODE = os.getenv('SERVER_MODE', 'wsgi')
+if SERVER_MODE not in ('wsgi', 'asgi'):
+    raise RuntimeError(f'SERVER_MODE must be wsgi or asgi, not {SERVER_MODE}')
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = f'0.0.0.0:{os.getenv("PORT", 8000)}'
+
+if SERVER_MODE == 'asgi':
+    wsgi_app = 'app.asgi:application'
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'uvicorn_worker.UvicornWorker')
+    # event loop worker serves many connections, one worker per core is enough
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count + 1))
+    # sync ORM code runs in thread pool of event loop, connections of threads are not reused reliably
+    os.environ.setdefault('DB_CONN_MAX_AGE', '0')
+else:
+    wsgi_app = 'app.wsgi:application'
+    worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+    # requests mostly wait for database, so workers and threads are more than cores
+    workers = int(os.getenv('WEB_CONCURRENCY', cpu_count * 2 + 1))
+    threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# restart worker after some requests, so slow memory leaks are contained, jitter keeps workers from restarting at once
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 1000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 100))
+
+# seconds of waiting for next request on kept-alive connection, should be less than timeout of proxy in front
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# application is imported once in master, workers are forked with it, so they start faster and share memory
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+
+accesslog = os.getenv('GUNICORN_ACCESS_LOG') or None
+errorlog = '-'
+
+# metrics of workers are summed from their files in this directory, see app.metrics, METRICS_DIR='' disables it
+metrics_dir = os.environ.setdefault('METRICS_DIR', os.path.join(tempfile.gettempdir(), 'gamerup-metrics'))
+
+
+def on_starting(server):
+    """Counters of previous server run are dropped, Prometheus treats it as counter reset"""
+    if metrics_dir:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir)
+
+
+def post_fork(server, worker):
+    """Connections opened in master while application was preloaded must not be shared by workers"""
+    if preload_app:
+        from django.db import connections
+
+        connections.close_all()
@@ -0,0 +1,40 @@
+import base64
+
+from django.core.mail.backends.base import BaseEmailBackend
+
+from jobs.tasks import send_email
+
+
+class QueuedEmailBackend(BaseEmailBackend):
+    """
+    Email backend putting messages into job queue instead of sending them in request,
+    worker sends them with QUEUED_EMAIL_BACKEND and retries on failures
+    """
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            send_email.delay(message=self.serialize(message))
+        return len(email_messages)
+
+    @staticmethod
+    def serialize(message) -> dict:
+        attachments = []
+        for attachment in message.attachments:
+            # attachments given as MIME objects are not supported by queue
+            filename, content, mimetype = attachment
+            if isinstance(content, str):
+                content = content.encode()
+            attachments.append((filename, base64.b64encode(content).decode(), mimetype))
+
+        return {
+            'subject': message.subject,
+            'body': message.body,
+            'from_email': message.from_email,
+            'to': message.to,
+            'cc': message.cc,
+            'bcc': message.bcc,
+            'reply_to': message.reply_to,
+            'headers': message.extra_headers,
+            'alternatives': getattr(message, 'alternatives', []),
+            'attachments': attachments,
+        }
@@ -0,0 +1,28 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from jobs.queue import run_pending, requeue_stale_jobs
+
+
+class Command(BaseCommand):
+    help = 'Run background jobs worker'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='process due jobs and exit')
+        parser.add_argument('--batch', type=int, default=10, help='jobs claimed at once')
+
+    def handle(self, *args, once=False, batch=10, **options):
+        self.stdout.write('jobs worker started')
+        while True:
+            close_old_connections()
+            requeue_stale_jobs()
+            processed = run_pending(batch)
+            if processed:
+                self.stdout.write(f'{processed} jobs processed')
+            elif once:
+                return
+            else:
+                time.sleep(settings.JOBS_POLL_INTERVAL)
@@ -0,0 +1,28 @@
+from django.db import models
+from django.utils.timezone import now
+
+
+class Job(models.Model):
+    class Meta:
+        indexes = [
+            # worker picks due pending jobs
+            models.Index(fields=['status', 'run_at'], name='job_queue_idx'),
+        ]
+
+    class Status(models.TextChoices):
+        PENDING = 'pending'
+        RUNNING = 'running'
+        FAILED = 'failed'
+
+    name = models.CharField(max_length=255)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=16, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_at = models.DateTimeField(default=now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Job({self.id}, {self.name}, {self.status})"
@@ -0,0 +1,118 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction, connection
+from django.db.models import F
+from django.utils.timezone import now
+
+from jobs.models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(func=None, *, max_attempts=None, unique=False):
+    """
+    Register function as background job, it gets 'delay' method putting call into the queue:
+
+        @task
+        def send_email(message): ...
+
+        send_email.delay(message=message)
+
+    Arguments must be JSON serializable and are passed as keyword arguments only.
+    Calls of unique task are not queued while the same call is pending.
+    """
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        registry[name] = func
+        func.delay = lambda **kwargs: enqueue(name, kwargs, max_attempts=max_attempts, unique=unique)
+        return func
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def enqueue(name: str, kwargs: dict, max_attempts=None, run_at=None, unique=False):
+    """
+    Put job into the queue, it is visible for workers after commit of current transaction.
+    With JOBS_ALWAYS_EAGER setting job is done immediately, in current process.
+    Unique job is not queued again while the same job is pending, pending one is returned.
+    """
+    if name not in registry:
+        raise KeyError(f'job {name} is not registered')
+
+    if settings.JOBS_ALWAYS_EAGER:
+        registry[name](**kwargs)
+        return None
+
+    if unique:
+        # running job may have read data before current change, so only pending job covers it
+        pending = Job.objects.filter(name=name, status=Job.Status.PENDING, payload=kwargs).first()
+        if pending is not None:
+            return pending
+
+    return Job.objects.create(
+        name=name,
+        payload=kwargs,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=run_at or now(),
+    )
+
+
+def claim_jobs(limit: int) -> list:
+    """Lock due pending jobs for current worker, jobs locked by other workers are skipped"""
+    with transaction.atomic():
+        queryset = Job.objects.filter(status=Job.Status.PENDING, run_at__lte=now()).order_by('run_at')
+        if connection.features.has_select_for_update_skip_locked:
+            queryset = queryset.select_for_update(skip_locked=True)
+        jobs = list(queryset[:limit])
+        if jobs:
+            Job.objects.filter(pk__in=[job.pk for job in jobs]).update(
+                status=Job.Status.RUNNING, locked_at=now(), attempts=F('attempts') + 1
+            )
+    for job in jobs:
+        job.attempts += 1
+    return jobs
+
+
+def requeue_stale_jobs() -> int:
+    """Return jobs of crashed workers to the queue"""
+    stale_at = now() - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT)
+    return Job.objects.filter(status=Job.Status.RUNNING, locked_at__lt=stale_at).update(
+        status=Job.Status.PENDING, locked_at=None
+    )
+
+
+def run_job(job: Job) -> bool:
+    """Do claimed job, failed job is retried later with exponential backoff. Returns True on success"""
+    try:
+        func = registry[job.name]
+        func(**job.payload)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('job %s failed, attempt %s of %s\n%s', job, job.attempts, job.max_attempts, error)
+        job.last_error = error
+        job.locked_at = None
+        if job.attempts < job.max_attempts:
+            job.status = Job.Status.PENDING
+            job.run_at = now() + timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (job.attempts - 1))
+        else:
+            job.status = Job.Status.FAILED
+        job.save(update_fields=['status', 'run_at', 'locked_at', 'last_error'])
+        return False
+
+    job.delete()
+    return True
+
+
+def run_pending(limit: int = 10) -> int:
+    """Claim and do one batch of due jobs, returns amount of processed jobs"""
+    jobs = claim_jobs(limit)
+    for job in jobs:
+        run_job(job)
+    return len(jobs)
@@ -0,0 +1,41 @@
+import base64
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.mail import EmailMultiAlternatives, get_connection
+
+from app.images import generate_thumbnails, delete_thumbnails
+from jobs.queue import task
+
+
+@task
+def send_email(message: dict):
+    """Send email serialized by jobs.backends.QueuedEmailBackend with QUEUED_EMAIL_BACKEND"""
+    email = EmailMultiAlternatives(
+        subject=message['subject'],
+        body=message['body'],
+        from_email=message['from_email'],
+        to=message['to'],
+        cc=message['cc'],
+        bcc=message['bcc'],
+        reply_to=message['reply_to'],
+        headers=message['headers'],
+        alternatives=[tuple(alternative) for alternative in message['alternatives']],
+        connection=get_connection(settings.QUEUED_EMAIL_BACKEND),
+    )
+    for filename, content, mimetype in message['attachments']:
+        email.attach(filename, base64.b64decode(content), mimetype)
+    email.send()
+
+
+@task
+def generate_image_thumbnails(name: str):
+    """Generate thumbnails of stored image"""
+    generate_thumbnails(default_storage, name)
+
+
+@task
+def delete_image_files(name: str):
+    """Delete stored image with its thumbnails"""
+    default_storage.delete(name)
+    delete_thumbnails(default_storage, name)
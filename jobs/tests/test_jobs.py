@@ -0,0 +1,103 @@
+from datetime import timedelta
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core import mail
+from django.test import override_settings
+from django.urls import reverse
+from django.utils.timezone import now
+
+from jobs.models import Job
+from jobs.queue import task, run_pending, requeue_stale_jobs
+
+calls = []
+
+
+@task
+def flaky_job(fail_times: int):
+    """job failing first 'fail_times' attempts"""
+    calls.append(fail_times)
+    if len(calls) <= fail_times:
+        raise RuntimeError('flaky job failed')
+
+
+@task(unique=True)
+def unique_job(key: str):
+    """job queued once while pending"""
+    calls.append(key)
+
+
+@override_settings(
+    JOBS_ALWAYS_EAGER=False,
+    EMAIL_BACKEND='jobs.backends.QueuedEmailBackend',
+    QUEUED_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class JobsTests(APITestCase):
+    def setUp(self):
+        """set up for every test"""
+        calls.clear()
+
+    def test_queued_email(self):
+        """test: activation email is sent by worker, not in registration request"""
+        data = {
+            'email': 'new@a.com',
+            'username': 'new_user',
+            'password': 'hard_password_123',
+            're_password': 'hard_password_123',
+        }
+        response = self.client.post(reverse('useraccount-list'), data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Job.objects.count(), 1)
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['new@a.com'])
+        self.assertTrue(mail.outbox[0].alternatives)
+        self.assertEqual(Job.objects.count(), 0)
+
+    def test_retries(self):
+        """test: failed job is retried later and marked as failed after last attempt"""
+        flaky_job.delay(fail_times=1)
+
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run_pending(), 1)
+        job = Job.objects.get()
+        self.assertEqual(job.status, Job.Status.PENDING)
+        self.assertEqual(job.attempts, 1)
+        self.assertIn('flaky job failed', job.last_error)
+        self.assertGreater(job.run_at, now())
+
+        # retry is not due yet
+        self.assertEqual(run_pending(), 0)
+
+        Job.objects.update(run_at=now())
+        self.assertEqual(run_pending(), 1)
+        self.assertFalse(Job.objects.exists())
+
+        flaky_job.delay(fail_times=10)
+        Job.objects.update(max_attempts=1)
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            run_pending()
+        self.assertEqual(Job.objects.get().status, Job.Status.FAILED)
+
+    def test_stale_jobs(self):
+        """test: jobs of crashed workers are returned to queue"""
+        flaky_job.delay(fail_times=0)
+        Job.objects.update(status=Job.Status.RUNNING, locked_at=now() - timedelta(days=1))
+
+        self.assertEqual(requeue_stale_jobs(), 1)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [0])
+
+    def test_unique(self):
+        """test: unique job is queued once while pending, again when it is running"""
+        first = unique_job.delay(key='a')
+        self.assertEqual(unique_job.delay(key='a'), first)
+        unique_job.delay(key='b')
+        self.assertEqual(Job.objects.count(), 2)
+
+        Job.objects.filter(pk=first.pk).update(status=Job.Status.RUNNING)
+        unique_job.delay(key='a')
+        self.assertEqual(Job.objects.filter(status=Job.Status.PENDING).count(), 2)
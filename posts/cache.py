@@ -0,0 +1,115 @@
+import hashlib
+import time
+from functools import wraps
+
+from rest_framework.response import Response
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+from app.metrics import RESPONSE_CACHE
+
+
+class ResponseCache:
+    """
+    Cache of serialized responses for anonymous read requests.
+    Every response belongs to groups (e.g. 'posts', 'post:<id>') and is stored under current versions of them,
+    so invalidation of group is one version bump, no matter how many pages and query params were cached.
+    Versions are shared by workers only on shared cache (REDIS_URL), with local memory cache invalidation
+    reaches the worker of change only, see security.checks.
+    """
+    key_prefix = 'responses'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def cache(self):
+        return caches[settings.RESPONSE_CACHE_ALIAS]
+
+    def make_key(self, url, groups):
+        """Make key for response of url with current versions of its groups"""
+        versions = ':'.join(str(version) for version in self._get_versions(groups))
+        digest = hashlib.md5(f'{url}|{versions}'.encode()).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+    def get(self, key):
+        """Get cached data, or None"""
+        data = self.cache.get(key)
+        if data is None:
+            self.misses += 1
+            RESPONSE_CACHE.inc('miss')
+        else:
+            self.hits += 1
+            RESPONSE_CACHE.inc('hit')
+        return data
+
+    def set(self, key, data):
+        self.cache.set(key, data, settings.RESPONSE_CACHE_TIMEOUT)
+
+    def invalidate(self, *groups):
+        """Drop cached responses of groups, now and after commit of current transaction"""
+        self._bump_versions(groups)
+        if transaction.get_connection().in_atomic_block:
+            # response could be cached again with old data before the transaction is committed
+            transaction.on_commit(lambda: self._bump_versions(groups))
+
+    def _bump_versions(self, groups):
+        for group in groups:
+            try:
+                self.cache.incr(self._version_key(group))
+            except ValueError:
+                # nothing was cached for the group yet
+                pass
+
+    def _get_versions(self, groups):
+        keys = [self._version_key(group) for group in groups]
+        versions = self.cache.get_many(keys)
+        for key in keys:
+            if key not in versions:
+                # expired version must not start from 1 again, otherwise old responses would come back
+                self.cache.add(key, time.time_ns(), settings.RESPONSE_CACHE_TIMEOUT)
+                versions[key] = self.cache.get(key)
+        return [versions[key] for key in keys]
+
+    def _version_key(self, group):
+        return f'{self.key_prefix}:version:{group}'
+
+
+response_cache = ResponseCache()
+
+
+def cache_response(method):
+    """
+    Cache response of viewset action for anonymous GET requests,
+    groups of response are given by view's get_cache_groups()
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if request.method != 'GET' or request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+
+        try:
+            groups = self.get_cache_groups()
+        except ValidationError:
+            # malformed id in url, view will answer with 404
+            return method(self, request, *args, **kwargs)
+
+        # key is made before the response, so response of invalidated data is stored under old versions
+        key = response_cache.make_key(request.build_absolute_uri(), groups)
+        data = response_cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = method(self, request, *args, **kwargs)
+        if isinstance(response, Response) and response.status_code == 200:
+            response_cache.set(key, response.data)
+            response['X-Cache'] = 'MISS'
+        return response
+
+    return wrapper
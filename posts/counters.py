@@ -0,0 +1,106 @@
+import atexit
+import logging
+import os
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+
+class ViewsBuffer:
+    """
+    Write-behind accumulator for 'views' counters.
+    Views are summed in process memory by (model, object id) and flushed to the database
+    as batched 'UPDATE ... SET views = views + n' queries, one query per model and delta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = defaultdict(int)
+        self._thread = None
+        self._thread_pid = None
+        self._stop = threading.Event()
+
+    def add(self, model, pk, count=1):
+        """Add views for object and return amount of views which are not flushed yet"""
+        with self._lock:
+            key = (model, pk)
+            self._pending[key] += count
+            pending = self._pending[key]
+            size = len(self._pending)
+
+        if size >= settings.VIEWS_FLUSH_THRESHOLD:
+            self.flush()
+        else:
+            self._ensure_flusher()
+        return pending
+
+    def pending(self, model, pk):
+        """Get amount of not flushed views for object"""
+        with self._lock:
+            return self._pending.get((model, pk), 0)
+
+    def flush(self):
+        """Apply all pending views to the database"""
+        with self._lock:
+            pending, self._pending = self._pending, defaultdict(int)
+        if not pending:
+            return
+
+        batches = defaultdict(list)
+        for (model, pk), count in pending.items():
+            batches[(model, count)].append(pk)
+
+        batches = list(batches.items())
+        for index, ((model, count), pks) in enumerate(batches):
+            try:
+                changes = getattr(model, 'counter_update_fields', {})
+                model.objects.filter(pk__in=pks).update(views=F('views') + count, **changes)
+            except Exception:
+                # give not applied views back, so they will be flushed next time
+                with self._lock:
+                    for (failed_model, failed_count), failed_pks in batches[index:]:
+                        for pk in failed_pks:
+                            self._pending[(failed_model, pk)] += failed_count
+                raise
+
+    def _ensure_flusher(self):
+        """Start background flush thread in current process, if it is enabled"""
+        interval = settings.VIEWS_FLUSH_INTERVAL
+        if not interval:
+            return
+        # threads do not survive fork, so every worker process starts its own
+        if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+            return
+
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid() and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(interval,), name='views-flusher', daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self, interval):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('views flush failed')
+            finally:
+                close_old_connections()
+
+    def flush_at_exit(self):
+        """Flush views left in buffer when process is stopping"""
+        self._stop.set()
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('views flush at exit failed')
+
+
+views_buffer = ViewsBuffer()
+atexit.register(views_buffer.flush_at_exit)
@@ -0,0 +1,34 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand
+
+from accounts.models import UserAccount
+from app.images import generate_thumbnails
+from posts.models import PostImage
+
+
+class Command(BaseCommand):
+    help = 'Generate thumbnails for avatars and post images uploaded before image processing was added'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--overwrite', action='store_true', help='regenerate existing thumbnails too')
+
+    def handle(self, *args, overwrite=False, **options):
+        processed = created = failed = 0
+        for model in (UserAccount, PostImage):
+            storage = model._meta.get_field('image').storage
+            # many users share default avatars, every file is processed once
+            names = (
+                model.objects.exclude(image='').exclude(image__isnull=True)
+                .order_by('image').values_list('image', flat=True).distinct().iterator()
+            )
+            for name in names:
+                processed += 1
+                try:
+                    created += len(generate_thumbnails(storage, name, overwrite=overwrite))
+                except (OSError, ValidationError) as err:
+                    failed += 1
+                    self.stderr.write(f'{name}: {err}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{processed} images processed, {created} thumbnails created, {failed} images failed'
+        ))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts.models import Post
+from posts.search import get_search_backend
+
+
+class Command(BaseCommand):
+    help = 'Rebuild full-text search index of posts, e.g. after bulk imports or on database without it'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help='posts indexed in one transaction')
+
+    def handle(self, *args, batch=1000, **options):
+        backend = get_search_backend()
+        indexed = 0
+        last_pk = None
+        while True:
+            queryset = Post.objects.order_by('pk')
+            if last_pk is not None:
+                queryset = queryset.filter(pk__gt=last_pk)
+            post_ids = list(queryset.values_list('pk', flat=True)[:batch])
+            if not post_ids:
+                break
+            with transaction.atomic():
+                backend.index_posts(post_ids)
+            indexed += len(post_ids)
+            last_pk = post_ids[-1]
+            self.stdout.write(f'{indexed} posts indexed')
+        backend.remove_orphans()
+
+        self.stdout.write(self.style.SUCCESS(f'search index rebuilt, {indexed} posts indexed'))
@@ -0,0 +1,58 @@
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils import timezone
+
+from posts.cache import response_cache
+from posts.models import Post, Comment
+
+
+class Command(BaseCommand):
+    help = 'Repair drift of comment counters and last activity of posts, e.g. after comments were deleted in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=1000, help='posts checked in one transaction')
+
+    def handle(self, *args, batch=1000, **options):
+        checked = repaired = 0
+        last_pk = None
+        while True:
+            with transaction.atomic():
+                # locked posts can't get new comments until the batch is repaired, so counters are not lost
+                queryset = Post.objects.order_by('pk').only('pk', 'user', 'comment_count', 'last_activity_at')
+                if last_pk is not None:
+                    queryset = queryset.filter(pk__gt=last_pk)
+                posts = list(queryset.select_for_update()[:batch])
+                if not posts:
+                    break
+                last_pk = posts[-1].pk
+
+                comments = {
+                    row['user_post']: row for row in
+                    Comment.objects.filter(user_post__in=posts).order_by().values('user_post')
+                    .annotate(count=Count('*'), latest=Max('created_at'))
+                }
+                drifted = [post for post in posts if self.repair(post, comments.get(post.pk))]
+                Post.objects.bulk_update(drifted, ['comment_count', 'last_activity_at'])
+
+            for post in drifted:
+                response_cache.invalidate(*post.get_cache_groups())
+            checked += len(posts)
+            repaired += len(drifted)
+
+        self.stdout.write(self.style.SUCCESS(f'{checked} posts checked, {repaired} posts repaired'))
+
+    @staticmethod
+    def repair(post, comments) -> bool:
+        """Set actual counters to post, returns True if they were drifted"""
+        count = comments['count'] if comments else 0
+        drifted = post.comment_count != count
+        post.comment_count = count
+
+        # comments keep only the day of creation, activity is moved to it if it is older
+        if comments and timezone.localdate(post.last_activity_at) < comments['latest']:
+            post.last_activity_at = timezone.make_aware(datetime.combine(comments['latest'], time.min))
+            drifted = True
+        return drifted
@@ -0,0 +1,50 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection, transaction
+
+from posts.cache import response_cache
+from posts.models import Post
+from posts.ranking import get_hot_score
+
+
+class Command(BaseCommand):
+    help = 'Recompute hot scores of posts whose likes, views or comments changed since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch', type=int, default=500, help='posts scored in one transaction')
+        parser.add_argument('--interval', type=int, default=0, help='keep running, refreshing every N seconds')
+
+    def handle(self, *args, batch=500, interval=0, **options):
+        while True:
+            close_old_connections()
+            refreshed = self.refresh(batch)
+            self.stdout.write(f'{refreshed} posts scored')
+            if not interval:
+                return
+            time.sleep(interval)
+
+    @staticmethod
+    def refresh(batch: int) -> int:
+        """Score all dirty posts by batches, returns amount of scored posts"""
+        fields = ['pk', 'posted_at', 'score_dirty', 'hot_score', *settings.HOT_SCORE_WEIGHTS]
+        refreshed = 0
+        while True:
+            with transaction.atomic():
+                # counters of locked posts are not changed until they are scored, so no change is missed,
+                # posts locked by like requests are skipped and scored on the next run
+                queryset = Post.objects.filter(score_dirty=True).order_by().only(*fields)
+                if connection.features.has_select_for_update_skip_locked:
+                    queryset = queryset.select_for_update(skip_locked=True)
+                posts = list(queryset[:batch])
+                for post in posts:
+                    post.hot_score = get_hot_score(post)
+                    post.score_dirty = False
+                Post.objects.bulk_update(posts, ['hot_score', 'score_dirty'])
+            refreshed += len(posts)
+            if len(posts) < batch:
+                if refreshed:
+                    # feed pages are cached under 'posts' group, likes don't invalidate it
+                    response_cache.invalidate('posts')
+                return refreshed
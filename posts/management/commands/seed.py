@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts.seeding import Seeder
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed database with deterministic synthetic users, posts, likes and comments. '
+        'PostgreSQL rows are written with COPY, other databases use bulk_create'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--likes', type=int, default=100000, help='at most users * posts')
+        parser.add_argument('--comments', type=int, default=10000)
+        parser.add_argument('--days', type=int, default=365, help='posts are spread over this amount of days')
+        parser.add_argument('--batch', type=int, default=10000, help='rows written in one transaction')
+        parser.add_argument('--seed', type=int, default=1, help='seed of generated texts')
+        parser.add_argument('--password', default='password123', help='password of all seeded users')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, users, posts, likes, comments, days, batch, seed, password, database, **options):
+        if users < 1 or posts < 1:
+            raise CommandError('at least one user and one post are seeded')
+        if likes > users * posts:
+            raise CommandError('every user can like post only once, so likes are at most users * posts')
+        seeder = Seeder(batch_size=batch, seed=seed, password=password, progress=self.progress, using=database)
+        if seeder.is_seeded():
+            raise CommandError(f'database is already seeded, users @{seeder.email_domain} exist')
+
+        started = time.perf_counter()
+        seeder.seed_users(users)
+        seeder.seed_posts(posts, days=days)
+        seeder.seed_likes(likes)
+        seeder.seed_comments(comments)
+        self.stdout.write(self.style.SUCCESS(f'seeded in {time.perf_counter() - started:.1f}s'))
+        self.stdout.write('run "refresh_hot_scores" and "rebuild_search_index" to score and index seeded posts')
+
+    def progress(self, table: str, done: int, total: int):
+        # one line per table, rewritten after every batch
+        self.stdout.write(f'\r{table}: {done}/{total}', ending='\n' if done == total else '')
+        self.stdout.flush()
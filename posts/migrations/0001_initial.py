@@ -0,0 +1,59 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:48
+
+import app.utils
+import django.db.models.deletion
+import posts.validators
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Post',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateField(auto_now_add=True)),
+                ('title', models.CharField(blank=True, max_length=255)),
+                ('content', models.TextField()),
+                ('views', models.IntegerField(default=0)),
+                ('like_counter', models.IntegerField(default=0, validators=[posts.validators.validate_zero_or_more])),
+                ('liked_by', models.ManyToManyField(blank=True, related_name='liked_posts', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'views'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Comment',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('created_at', models.DateField(auto_now_add=True)),
+                ('content', models.TextField()),
+                ('like_counter', models.IntegerField(default=0, validators=[posts.validators.validate_zero_or_more])),
+                ('liked_by', models.ManyToManyField(blank=True, related_name='liked_comments', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('user_post', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='posts.post')),
+            ],
+            options={
+                'ordering': ['like_counter'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PostImage',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('image', models.ImageField(upload_to=app.utils.get_post_image_upload_path)),
+                ('user_post', models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, to='posts.post')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='views',
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:48
+
+from django.conf import settings
+from django.db import migrations, models
+
+from app.db import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently on PostgreSQL, it is not possible inside transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0002_comment_views'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='comment',
+            index=models.Index(fields=['user_post', 'created_at', 'id'], name='comment_thread_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=models.Index(fields=['user', '-created_at', '-id'], name='post_user_feed_idx'),
+        ),
+    ]
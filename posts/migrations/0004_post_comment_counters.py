@@ -0,0 +1,62 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:59
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models, transaction
+from django.db.models import Count, DateTimeField, F, Max, OuterRef, Subquery
+from django.db.models.functions import Cast, Coalesce
+
+
+BATCH_SIZE = 1000
+
+
+def fill_comment_counters(apps, schema_editor):
+    """
+    Count comments of existing posts, last activity is the day of the latest comment or of the post.
+    Posts are updated by batches in separate transactions, so rows of large table are not locked all at once,
+    interrupted migration is finished by 'reconcile_post_counters' command
+    """
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    comments = Comment.objects.filter(user_post=OuterRef('pk')).order_by().values('user_post')
+    last_pk = None
+    while True:
+        posts = Post.objects.order_by('pk')
+        if last_pk is not None:
+            posts = posts.filter(pk__gt=last_pk)
+        pks = list(posts.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        last_pk = pks[-1]
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Post.objects.filter(pk__in=pks).update(
+                comment_count=Coalesce(Subquery(comments.annotate(count=Count('*')).values('count')), 0),
+                last_activity_at=Cast(
+                    Coalesce(Subquery(comments.annotate(latest=Max('created_at')).values('latest')), F('created_at')),
+                    DateTimeField(),
+                ),
+            )
+
+
+class Migration(migrations.Migration):
+    # backfill commits batch by batch
+    atomic = False
+
+    dependencies = [
+        ('posts', '0003_feed_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_activity_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(fill_comment_counters, migrations.RunPython.noop),
+    ]
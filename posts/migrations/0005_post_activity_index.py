@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+from app.db import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # index is built concurrently on PostgreSQL, it is not possible inside transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0004_post_comment_counters'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=models.Index(fields=['-last_activity_at', '-id'], name='post_activity_idx'),
+        ),
+    ]
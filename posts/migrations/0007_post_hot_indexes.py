@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:01
+
+from django.db import migrations, models
+
+from app.db import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # indexes are built concurrently on PostgreSQL, it is not possible inside transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0006_post_hot_score'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+        ),
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=models.Index(condition=models.Q(('score_dirty', True)), fields=['id'], name='post_score_dirty_idx'),
+        ),
+    ]
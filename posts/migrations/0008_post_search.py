@@ -0,0 +1,36 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:04
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+def create_fts_table(apps, schema_editor):
+    """SQLite has no tsvector, its search index is FTS5 virtual table, see posts.search.SQLiteSearchBackend"""
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE posts_post_fts USING fts5('
+            "title, content, comments, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def drop_fts_table(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        schema_editor.execute('DROP TABLE posts_post_fts')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0007_post_hot_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_fts_table, drop_fts_table),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:04
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+from app.db import AddIndexConcurrentlyIfSupported
+
+
+class Migration(migrations.Migration):
+    # index is built concurrently on PostgreSQL, it is not possible inside transaction
+    atomic = False
+
+    dependencies = [
+        ('posts', '0008_post_search'),
+    ]
+
+    operations = [
+        AddIndexConcurrentlyIfSupported(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='post_search_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0010_timelineentry'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='created_at',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
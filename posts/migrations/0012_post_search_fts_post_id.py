@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.db import migrations
+
+
+def recreate_fts_table(schema_editor, post_column, key_column):
+    """Create FTS5 table of posts with given key of post and index all posts"""
+    schema_editor.execute('DROP TABLE posts_post_fts')
+    columns = 'title, content, comments' + (f', {post_column} UNINDEXED' if post_column != 'rowid' else '')
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE posts_post_fts USING fts5({columns}, tokenize = 'unicode61 remove_diacritics 2')"
+    )
+    schema_editor.execute(
+        f'INSERT INTO posts_post_fts ({post_column}, title, content, comments) '
+        f'SELECT post.{key_column}, post.title, post.content, '
+        f"(SELECT substr(group_concat(content, ' '), 1, %s) FROM (SELECT content FROM posts_comment "
+        f'WHERE user_post_id = post.id ORDER BY created_at, id)) '
+        f'FROM posts_post post',
+        [settings.SEARCH_COMMENTS_MAX_LENGTH],
+    )
+
+
+def link_by_post_id(apps, schema_editor):
+    """Rowids of posts_post change on table rebuilds, so FTS rows keep UUID of post instead"""
+    if schema_editor.connection.vendor == 'sqlite':
+        recreate_fts_table(schema_editor, 'post_id', 'id')
+
+
+def link_by_rowid(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        recreate_fts_table(schema_editor, 'rowid', 'rowid')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0011_post_created_at_local_date'),
+    ]
+
+    operations = [
+        migrations.RunPython(link_by_post_id, link_by_rowid),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.0.6 on 2026-10-18 10:56
+
+import django.utils.timezone
+from django.db import migrations, models, transaction
+from django.db.models import DateTimeField, F
+from django.db.models.functions import Cast
+
+
+BATCH_SIZE = 1000
+
+
+def fill_posted_at(apps, schema_editor):
+    """
+    Existing posts are taken as posted at the start of their day, so their hot scores don't change.
+    Posts are updated by batches in separate transactions, so rows of large table are not locked all at once
+    """
+    Post = apps.get_model('posts', 'Post')
+    last_pk = None
+    while True:
+        posts = Post.objects.order_by('pk')
+        if last_pk is not None:
+            posts = posts.filter(pk__gt=last_pk)
+        pks = list(posts.values_list('pk', flat=True)[:BATCH_SIZE])
+        if not pks:
+            return
+        last_pk = pks[-1]
+        with transaction.atomic(using=schema_editor.connection.alias):
+            Post.objects.filter(pk__in=pks).update(posted_at=Cast(F('created_at'), DateTimeField()))
+
+
+class Migration(migrations.Migration):
+    # backfill commits batch by batch
+    atomic = False
+
+    dependencies = [
+        ('posts', '0012_post_search_fts_post_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='posted_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+        migrations.RunPython(fill_posted_at, migrations.RunPython.noop),
+    ]
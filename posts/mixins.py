@@ -1,15 +1,69 @@
+import json
+from itertools import islice
+
 from rest_framework import generics
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly, SAFE_METHODS
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+
+from accounts.models import UserAccount
+from app.metrics import LIKES, VIEWS
+from posts.counters import views_buffer
 
 
 class LikeMixin(generics.GenericAPIView):
     """
     Mixin providing 'like' functionality for a ModelViewSet.
+    Read actions add 'is_liked' of requesting user to objects on ?with_liked=true,
+    it costs one query for whole page.
     """
+    # rate of 'like' action is set by its own scope, see app.throttling
+    throttle_scope = None
+
+    def with_liked_state(self):
+        """Check if client asked for 'is_liked' field"""
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return False
+        return self.request.query_params.get('with_liked', '').lower() in ('1', 'true')
+
+    def get_serializer(self, *args, **kwargs):
+        if args and self.with_liked_state():
+            objects = args[0] if kwargs.get('many') else [args[0]]
+            kwargs.setdefault('context', self.get_serializer_context())
+            model = self.get_queryset().model
+            kwargs['context']['liked_ids'] = model.get_liked_ids(self.request.user, [obj.pk for obj in objects])
+        return super().get_serializer(*args, **kwargs)
+
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def liked(self, request):
+        """
+        Get which of given objects are liked by user, ids are returned in order of request
+        Method : GET
+        api/v1/<route_name>/liked/?ids=<id>,<id>,...
+        Headers - {Authorization: JWT <access_token>}
+        """
+        raw_ids = [raw_id for value in request.query_params.getlist('ids') for raw_id in value.split(',') if raw_id]
+        max_ids = settings.LIKED_LOOKUP_MAX_IDS
+        if len(raw_ids) > max_ids:
+            raise ValidationError({'ids': f'Ensure there are no more than {max_ids} ids.'})
+
+        model = self.get_queryset().model
+        try:
+            ids = [model._meta.pk.to_python(raw_id) for raw_id in raw_ids]
+        except DjangoValidationError:
+            raise ValidationError({'ids': 'Invalid id.'})
+
+        liked_ids = model.get_liked_ids(request.user, ids)
+        return Response({'liked': [obj_id for obj_id in dict.fromkeys(ids) if obj_id in liked_ids]})
 
-    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticatedOrReadOnly])
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticatedOrReadOnly], throttle_scope='like')
     def like(self, request, pk=None):
         """
         Putting like for model if user not in many-to-many table or disabling like if user in it.
@@ -20,6 +74,7 @@ class LikeMixin(generics.GenericAPIView):
         obj = self.get_object()
         user = request.user
         message, like_counter = obj.like_by_user(user)
+        LIKES.inc(obj._meta.model_name, message)
         return Response({'status': 'success', 'message': message, 'like_counter': like_counter})
 
 
@@ -27,15 +82,82 @@ class ViewsCounterMixin(generics.GenericAPIView):
     """
     Mixin providing 'add view' functionality for a ModelViewSet.
     """
+    throttle_scope = None
 
-    @action(detail=True, methods=['post'], permission_classes=[], url_path='views')
+    @action(detail=True, methods=['post'], permission_classes=[], url_path='views', throttle_scope='views')
     def views_counter(self, request, pk=None):
         """
-        Adding view for model in views field
+        Adding view for model in views field, views are buffered and written to database in batches
         Method : POST
         api/v1/<route_name>/<instance_id>/views/
         """
-        obj = self.get_object()
-        obj.views += 1
-        obj.save()
-        return Response({'detail': {'views count': obj.views}})
+        queryset = self.get_queryset().values_list('views', flat=True)
+        stored_views = generics.get_object_or_404(queryset, pk=pk)
+        model = queryset.model
+        pending_views = views_buffer.add(model, model._meta.pk.to_python(pk))
+        VIEWS.inc(model._meta.model_name)
+        return Response({'detail': {'views count': stored_views + pending_views}})
+
+
+class CompactModeMixin(generics.GenericAPIView):
+    """
+    Mixin providing prefetched 'liked_by' ids for read actions of a ModelViewSet
+    and opt-in compact mode, which doesn't serialize 'liked_by' at all.
+    Compact mode: api/v1/<route_name>/?compact=true
+    """
+    compact_serializer_class = None
+    prefetch_actions = ('list', 'retrieve')
+
+    def is_compact(self):
+        """Check if client asked for compact objects"""
+        if self.request is None or self.request.method not in SAFE_METHODS:
+            return False
+        return self.request.query_params.get('compact', '').lower() in ('1', 'true')
+
+    def get_serializer_class(self):
+        if self.compact_serializer_class is not None and self.is_compact():
+            return self.compact_serializer_class
+        return super().get_serializer_class()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.prefetch_actions and not self.is_compact():
+            # only ids of users are serialized, so there is no need to load whole rows
+            queryset = queryset.prefetch_related(Prefetch('liked_by', queryset=UserAccount.objects.only('id')))
+        return queryset
+
+
+class PaginatedActionMixin(generics.GenericAPIView):
+    """
+    Mixin providing paginated responses for custom list actions of a ModelViewSet.
+    By default viewset paginator is used, ?stream=true streams all objects as JSON array for export.
+    """
+    stream_chunk_size = 500
+
+    def paginated_response(self, queryset):
+        """Paginate queryset and serialize page or stream whole queryset"""
+        params = self.request.query_params
+        if params.get('stream', '').lower() in ('1', 'true'):
+            return self.streaming_response(queryset)
+
+        paginator = self.paginator
+        page = paginator.paginate_queryset(queryset, self.request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    def streaming_response(self, queryset):
+        """Stream queryset as JSON array, loading and serializing it by chunks"""
+        objects = queryset.iterator(chunk_size=self.stream_chunk_size)
+
+        def generate():
+            yield '['
+            first_chunk = True
+            while chunk := list(islice(objects, self.stream_chunk_size)):
+                data = self.get_serializer(chunk, many=True).data
+                encoded = json.dumps(data, cls=JSONEncoder, ensure_ascii=False)[1:-1]
+                if encoded:
+                    yield encoded if first_chunk else ',' + encoded
+                    first_chunk = False
+            yield ']'
+
+        return StreamingHttpResponse(generate(), content_type='application/json')
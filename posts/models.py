@@ -1,41 +1,144 @@
 import uuid
 
-from django.db import models
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
+from django.db import models, transaction, IntegrityError
+from django.db.models import F
+from django.utils import timezone
 
 from accounts.models import UserAccount
 from app.utils import get_post_image_upload_path
+from jobs.tasks import generate_image_thumbnails, delete_image_files
+from posts.cache import response_cache
+from posts.ranking import get_hot_score
 from posts.validators import validate_zero_or_more
 
 
-class Post(models.Model):
+class LikeableMixin:
+    """
+    Mixin for models with 'liked_by' many-to-many field and 'like_counter' field.
+    Toggles like with constant number of queries, no matter how many likes object has.
+    """
+    # extra changes of in place counter updates (likes, views, comments)
+    counter_update_fields = {}
+
+    def like_by_user(self, user):
+        """Putting like for model if user not in many-to-many table or disabling like if user in it"""
+        through = self.liked_by.through
+        like_lookup = {
+            through._meta.get_field(self.liked_by.source_field_name).attname: self.pk,
+            through._meta.get_field(self.liked_by.target_field_name).attname: user.pk,
+        }
+        model_queryset = type(self).objects.filter(pk=self.pk)
+
+        with transaction.atomic():
+            # deleting by the (object, user) unique index doubles as the existence check
+            deleted, _ = through.objects.filter(**like_lookup).delete()
+            if deleted:
+                delta = -1
+                message = 'like removed'
+            else:
+                try:
+                    with transaction.atomic():
+                        through.objects.create(**like_lookup)
+                    delta = 1
+                except IntegrityError:
+                    # concurrent request has already put this like
+                    delta = 0
+                message = 'liked'
+
+            if delta:
+                model_queryset.update(like_counter=F('like_counter') + delta, **self.counter_update_fields)
+                response_cache.invalidate(*self.get_like_cache_groups())
+            self.like_counter = model_queryset.values_list('like_counter', flat=True).get()
+
+        return message, self.like_counter
+
+    def get_like_cache_groups(self):
+        """Groups of cached responses dropped by like of this object"""
+        return self.get_cache_groups()
+
+    @classmethod
+    def get_liked_ids(cls, user, ids) -> set:
+        """Ids of objects from 'ids' liked by user, one query by the (object, user) unique index"""
+        if not ids or not user.is_authenticated:
+            return set()
+        liked_by = cls._meta.get_field('liked_by')
+        through = liked_by.remote_field.through
+        object_id = through._meta.get_field(liked_by.m2m_field_name()).attname
+        user_id = through._meta.get_field(liked_by.m2m_reverse_field_name()).attname
+        return set(
+            through.objects.filter(**{user_id: user.pk, f'{object_id}__in': ids}).values_list(object_id, flat=True)
+        )
+
+
+class Post(LikeableMixin, models.Model):
     class Meta:
         ordering = ['created_at', 'views']
+        indexes = [
+            # feed, see PostCursorPagination
+            models.Index(fields=['-created_at', '-id'], name='post_feed_idx'),
+            # user's posts (get_by_user), also serves lookups by user
+            models.Index(fields=['user', '-created_at', '-id'], name='post_user_feed_idx'),
+            # feed sorted by activity, see PostActivityCursorPagination
+            models.Index(fields=['-last_activity_at', '-id'], name='post_activity_idx'),
+            # hot feed, see PostHotCursorPagination
+            models.Index(fields=['-hot_score', '-id'], name='post_hot_idx'),
+            # posts waiting for hot score refresh, see posts.ranking
+            models.Index(fields=['id'], condition=models.Q(score_dirty=True), name='post_score_dirty_idx'),
+            # full-text search on PostgreSQL, see posts.search
+            GinIndex(fields=['search_vector'], name='post_search_idx'),
+        ]
+    counter_update_fields = {'score_dirty': True}
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE)
-    created_at = models.DateField(auto_now_add=True)
+    # date of TIME_ZONE, the same one hot score is computed from, see posts.ranking
+    created_at = models.DateField(default=timezone.localdate, editable=False)
+    # moment of creation, age of post in hot score, see posts.ranking
+    posted_at = models.DateTimeField(default=timezone.now, editable=False)
     title = models.CharField(max_length=255, null=False, blank=True)
     content = models.TextField()
     views = models.IntegerField(default=0)
     like_counter = models.IntegerField(default=0, validators=[validate_zero_or_more])
     liked_by = models.ManyToManyField(UserAccount, related_name='liked_posts', blank=True)
+    # maintained by CommentViewSet, repaired by 'reconcile_post_counters' command
+    comment_count = models.IntegerField(default=0, editable=False)
+    last_activity_at = models.DateTimeField(default=timezone.now, editable=False)
+    # refreshed from counters by 'refresh_hot_scores' command, see posts.ranking
+    hot_score = models.FloatField(default=0, editable=False)
+    score_dirty = models.BooleanField(default=True, editable=False)
+    # document of post for full-text search on PostgreSQL, see posts.search
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"Post({self.id})"
 
-    def like_by_user(self, user):
-        """Putting like for model if user not in many-to-many table or disabling like if user in it"""
-        if user in self.liked_by.all():
-            self.liked_by.remove(user)
-            self.like_counter -= 1
-            message = 'like removed'
-        else:
-            self.liked_by.add(user)
-            self.like_counter += 1
-            message = 'liked'
-        self.save()
-
-        return message, self.like_counter
+    def save(self, *args, **kwargs):
+        """Save post, new post is scored at once to appear in hot feed"""
+        if self._state.adding:
+            self.hot_score = get_hot_score(self)
+            self.score_dirty = False
+        super().save(*args, **kwargs)
+
+    def count_comment(self, delta: int):
+        """Change comment counter of post in place, new comment is activity of post"""
+        changes = {'comment_count': F('comment_count') + delta, **self.counter_update_fields}
+        if delta > 0:
+            changes['last_activity_at'] = timezone.now()
+        Post.objects.filter(pk=self.pk).update(**changes)
+        response_cache.invalidate(*self.get_cache_groups())
+
+    def get_cache_groups(self):
+        """Groups of cached responses containing this post"""
+        return ['posts', f'post:{self.pk}', f'user_posts:{self.user_id}']
+
+    def get_like_cache_groups(self):
+        """
+        Only detail of post is dropped by like, otherwise like storm would flush every feed page.
+        Counters of post in cached feed pages are stale for RESPONSE_CACHE_TIMEOUT at most
+        """
+        return [f'post:{self.pk}']
 
 
 # TODO: refactor name
@@ -47,33 +150,64 @@ class PostImage(models.Model):
     def __str__(self):
         return f"PostPic({self.id})"
 
+    def save(self, *args, **kwargs):
+        """
+        Save post image and queue thumbnails generation for it, if image file is new.
+        Files of replaced image are deleted by background job after commit
+        """
+        is_new_file = bool(self.image) and not self.image._committed
+        old_name = None
+        if is_new_file and not self._state.adding:
+            old_name = PostImage.objects.filter(pk=self.pk).values_list('image', flat=True).first()
+        super().save(*args, **kwargs)
+        if is_new_file:
+            generate_image_thumbnails.delay(name=self.image.name)
+        if old_name and old_name != self.image.name:
+            transaction.on_commit(lambda: delete_image_files.delay(name=old_name))
+
 
 # TODO: refactor name
-class Comment(models.Model):
+class Comment(LikeableMixin, models.Model):
     class Meta:
         ordering = ['like_counter']
+        indexes = [
+            # post's comments (get_by_post), see CommentCursorPagination
+            models.Index(fields=['user_post', 'created_at', 'id'], name='comment_thread_idx'),
+        ]
 
     id = models.UUIDField(primary_key=True, default=uuid.uuid4)
     user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, null=False, blank=True)
     user_post = models.ForeignKey(Post, on_delete=models.CASCADE, null=False, blank=True)
     created_at = models.DateField(auto_now_add=True)
     content = models.TextField()
+    views = models.IntegerField(default=0)
     like_counter = models.IntegerField(default=0, validators=[validate_zero_or_more])
     liked_by = models.ManyToManyField(UserAccount, related_name='liked_comments', blank=True)
 
     def __str__(self):
         return f"Comment({self.id})"
 
-    def like_by_user(self, user):
-        """Putting like for model if user not in many-to-many table or disabling like if user in it"""
-        if user in self.liked_by.all():
-            self.liked_by.remove(user)
-            self.like_counter -= 1
-            message = 'like removed'
-        else:
-            self.liked_by.add(user)
-            self.like_counter += 1
-            message = 'liked'
-        self.save()
+    def get_cache_groups(self):
+        """Groups of cached responses containing this comment"""
+        return [f'comment:{self.pk}', f'post_comments:{self.user_post_id}']
 
-        return message, self.like_counter
+
+class TimelineEntry(models.Model):
+    """Post in home timeline of user, written by fan-out of new posts to followers of author, see posts.timeline"""
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'post'], name='unique_timeline_entry'),
+        ]
+        indexes = [
+            # home timeline, newest posts first, in the order of PostCursorPagination
+            models.Index(fields=['user', '-created_at', '-post'], name='timeline_idx'),
+        ]
+
+    user = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='timeline_entries')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+')
+    author = models.ForeignKey(UserAccount, on_delete=models.CASCADE, related_name='+')
+    # creation day of post, copied to keep timeline in one index
+    created_at = models.DateField()
+
+    def __str__(self):
+        return f"TimelineEntry({self.user_id}, {self.post_id})"
@@ -0,0 +1,164 @@
+import base64
+import binascii
+import json
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+from posts.timeline import get_timeline
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination by ordering key: the next page is selected with 'WHERE key > last key' instead of OFFSET,
+    and rows are not counted, so every page costs the same as the first one.
+    The last field of ordering must be unique.
+    """
+    ordering = ('created_at', 'id')
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        queryset = queryset.order_by(*self.ordering)
+
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_position_filter(position))
+
+        page = list(queryset[:self.page_size + 1])
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [self._get_field(name).value_to_string(last) for name, _ in self._ordering_fields()]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(position))
+
+    def get_position_filter(self, position):
+        """Build 'key > position' condition for compound key, respecting direction of every field"""
+        condition = Q()
+        equal = Q()
+        for (name, descending), value in zip(self._ordering_fields(), position):
+            lookup = 'lt' if descending else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def encode_cursor(self, position):
+        return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            position = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            fields = self._ordering_fields()
+            if not isinstance(position, list) or len(position) != len(fields):
+                raise ValueError
+            return [self._get_field(name).to_python(value) for (name, _), value in zip(fields, position)]
+        except (TypeError, ValueError, binascii.Error, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _ordering_fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def _get_field(self, name):
+        return self.model._meta.get_field(name)
+
+
+class PostCursorPagination(KeysetPagination):
+    """Feed pagination, newest posts first, posts of one day are ordered by id"""
+    ordering = ('-created_at', '-id')
+
+
+class TimelineCursorPagination(PostCursorPagination):
+    """Home timeline pagination, it is merged from stored timeline and posts of celebrities, see posts.timeline"""
+
+    def paginate_timeline(self, user_id, queryset, request):
+        self.request = request
+        self.model = queryset.model
+        page = get_timeline(user_id, queryset, self.decode_cursor(request), self.page_size + 1)
+        self.has_next = len(page) > self.page_size
+        self.page = page[:self.page_size]
+        return self.page
+
+
+class CommentCursorPagination(KeysetPagination):
+    """Thread pagination, oldest comments first, comments of one day are ordered by id"""
+    ordering = ('created_at', 'id')
+
+
+class PostActivityCursorPagination(KeysetPagination):
+    """Feed pagination, recently commented posts first"""
+    ordering = ('-last_activity_at', '-id')
+
+
+class PostHotCursorPagination(KeysetPagination):
+    """Hot feed pagination, posts with highest hot score first"""
+    ordering = ('-hot_score', '-id')
+
+
+class SearchPagination(BasePagination):
+    """
+    Pagination of ranked search results by page number. Rank is not a column, so there is no key to continue from,
+    results are not counted and pages deeper than SEARCH_MAX_PAGE are not served.
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = 'page'
+    invalid_page_message = 'Invalid page'
+
+    def paginate_search(self, search, request):
+        """Get page of results from 'search(offset, limit)' callable"""
+        self.request = request
+        try:
+            self.page_number = int(request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if not 1 <= self.page_number <= settings.SEARCH_MAX_PAGE:
+            raise NotFound(self.invalid_page_message)
+
+        results = search(offset=(self.page_number - 1) * self.page_size, limit=self.page_size + 1)
+        self.has_next = len(results) > self.page_size and self.page_number < settings.SEARCH_MAX_PAGE
+        return results[:self.page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
@@ -0,0 +1,17 @@
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def get_hot_score(post) -> float:
+    """
+    Rank of post in hot feed: log10 of weighted engagement (likes, comments, views) plus age bonus.
+    Newer post needs 10 times less engagement per HOT_SCORE_DECAY seconds to get the same rank,
+    so score depends on counters only and is recomputed only for posts whose counters changed.
+    """
+    engagement = sum(weight * getattr(post, field) for field, weight in settings.HOT_SCORE_WEIGHTS.items())
+    age_bonus = (post.posted_at - EPOCH).total_seconds() / settings.HOT_SCORE_DECAY
+    return math.log10(max(engagement, 1)) + age_bonus
@@ -0,0 +1,112 @@
+import hashlib
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def parse_range(header: str, size: int):
+    """
+    Parse single 'Range: bytes=start-end' header into (start, end) inclusive.
+    Returns None when whole file should be sent, raises ValueError when range is not satisfiable.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match or match.groups() == ('', ''):
+        # multiple or malformed ranges are ignored, as RFC 9110 allows
+        return None
+
+    start, end = match.groups()
+    if start == '':
+        # suffix range, last N bytes
+        length = int(end)
+        if length == 0:
+            raise ValueError('empty suffix range')
+        return max(size - length, 0), size - 1
+
+    start = int(start)
+    end = min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise ValueError('range is out of file')
+    return start, end
+
+
+def iter_file_range(storage, name: str, start: int, end: int):
+    """Read bytes [start, end] of stored file by chunks, file is opened only when iteration starts"""
+    with storage.open(name, 'rb') as file:
+        file.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = file.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def file_response(request, field_file, as_attachment: bool = True):
+    """
+    Response with stored file, streamed by chunks instead of loading it into memory.
+    Supports conditional GET (ETag, Last-Modified), single byte range requests
+    and handing file to the front proxy with FILE_SENDFILE_HEADER setting.
+    """
+    storage = field_file.storage
+    name = field_file.name
+    try:
+        size = storage.size(name)
+        modified = int(storage.get_modified_time(name).timestamp())
+    except OSError:
+        raise Http404('File not found')
+
+    filename = os.path.basename(name)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    etag = quote_etag(f'{hashlib.md5(name.encode()).hexdigest()[:16]}-{size:x}-{modified:x}')
+
+    validators = HttpResponse()
+    validators['ETag'] = etag
+    validators['Last-Modified'] = http_date(modified)
+    conditional = get_conditional_response(request, etag=etag, last_modified=modified, response=validators)
+    if conditional is not validators:
+        return conditional
+
+    sendfile_header = settings.FILE_SENDFILE_HEADER
+    if sendfile_header == 'X-Accel-Redirect':
+        response = HttpResponse(content_type=content_type)
+        response[sendfile_header] = settings.FILE_SENDFILE_PREFIX + name
+    elif sendfile_header == 'X-Sendfile':
+        response = HttpResponse(content_type=content_type)
+        response[sendfile_header] = storage.path(name)
+    else:
+        response = None
+        range_header = request.META.get('HTTP_RANGE')
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if range_header and (not if_range or if_range == etag):
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            if byte_range is not None:
+                start, end = byte_range
+                response = StreamingHttpResponse(
+                    iter_file_range(storage, name, start, end), status=206, content_type=content_type
+                )
+                response['Content-Range'] = f'bytes {start}-{end}/{size}'
+                response['Content-Length'] = end - start + 1
+        if response is None:
+            response = FileResponse(storage.open(name, 'rb'), content_type=content_type)
+            response.block_size = CHUNK_SIZE
+        response['Accept-Ranges'] = 'bytes'
+
+    if as_attachment:
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(modified)
+    return response
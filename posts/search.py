@@ -0,0 +1,131 @@
+from django.conf import settings
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import F, OuterRef, Q, Subquery, TextField, Value
+from django.db.models.functions import Coalesce, Left
+
+from posts.models import Post, Comment
+
+
+class SearchBackend:
+    """
+    Full-text index of posts. Document of post is its title, content and contents of its comments,
+    title matches are ranked higher than content matches, which are ranked higher than comment matches.
+    Only first SEARCH_COMMENTS_MAX_LENGTH characters of comments are indexed.
+    This base backend has no index, every search scans posts and comments, newest matches first.
+    """
+
+    def search(self, queryset, query: str, offset: int, limit: int) -> list:
+        """Posts of queryset matching query, best matches first"""
+        condition = Q()
+        for word in query.split():
+            condition &= Q(title__icontains=word) | Q(content__icontains=word) | Q(comment__content__icontains=word)
+        if not condition:
+            return []
+        return list(queryset.filter(condition).distinct().order_by('-created_at', '-id')[offset:offset + limit])
+
+    def index_posts(self, post_ids):
+        """Put current documents of posts into index"""
+
+    def remove_posts(self, post_ids):
+        """Remove posts from index, called before posts are deleted"""
+
+    def remove_orphans(self):
+        """Remove rows of deleted posts from index, if index is not part of posts table"""
+
+
+class PostgresSearchBackend(SearchBackend):
+    """'search_vector' tsvector column of post with GIN index"""
+
+    def search(self, queryset, query, offset, limit):
+        search_query = SearchQuery(query, config=settings.SEARCH_CONFIG, search_type='websearch')
+        return list(
+            queryset.filter(search_vector=search_query)
+            .annotate(rank=SearchRank(F('search_vector'), search_query))
+            .order_by('-rank', '-id')[offset:offset + limit]
+        )
+
+    def index_posts(self, post_ids):
+        comments = (
+            Comment.objects.filter(user_post=OuterRef('pk')).order_by().values('user_post')
+            .annotate(text=Left(
+                StringAgg('content', ' ', ordering=('created_at', 'id')), settings.SEARCH_COMMENTS_MAX_LENGTH
+            ))
+            .values('text')
+        )
+        config = settings.SEARCH_CONFIG
+        Post.objects.filter(pk__in=post_ids).update(search_vector=(
+            SearchVector('title', weight='A', config=config)
+            + SearchVector('content', weight='B', config=config)
+            + SearchVector(Coalesce(Subquery(comments), Value(''), output_field=TextField()), weight='C', config=config)
+        ))
+
+
+class SQLiteSearchBackend(SearchBackend):
+    """
+    FTS5 virtual table 'posts_post_fts', created by posts.0008_post_search and posts.0012_post_search_fts_post_id.
+    Rows are linked to posts by unindexed 'post_id' column, rows of deleted posts are never returned,
+    as they don't join. Rowids are not used, SQLite renumbers them when posts table is rebuilt.
+    """
+    table = 'posts_post_fts'
+    # bm25 weights of title, content and comments columns
+    weights = (10.0, 5.0, 1.0)
+
+    def search(self, queryset, query, offset, limit):
+        # every word is quoted, so FTS5 query syntax of user input is not interpreted
+        match = ' '.join('"{}"'.format(word.replace('"', '""')) for word in query.split())
+        if not match:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT post.id FROM {self.table} JOIN posts_post post ON post.id = {self.table}.post_id '
+                f'WHERE {self.table} MATCH %s ORDER BY bm25({self.table}, %s, %s, %s) LIMIT %s OFFSET %s',
+                [match, *self.weights, limit, offset],
+            )
+            post_ids = [Post._meta.pk.to_python(row[0]) for row in cursor.fetchall()]
+        posts = queryset.in_bulk(post_ids)
+        return [posts[post_id] for post_id in post_ids if post_id in posts]
+
+    def index_posts(self, post_ids):
+        with connection.cursor() as cursor:
+            placeholders, params = self._delete_posts(cursor, post_ids)
+            if params:
+                cursor.execute(
+                    f'INSERT INTO {self.table} (post_id, title, content, comments) '
+                    f'SELECT post.id, post.title, post.content, '
+                    f"(SELECT substr(group_concat(content, ' '), 1, %s) FROM (SELECT content FROM posts_comment "
+                    f'WHERE user_post_id = post.id ORDER BY created_at, id)) '
+                    f'FROM posts_post post WHERE post.id IN ({placeholders})',
+                    [settings.SEARCH_COMMENTS_MAX_LENGTH, *params],
+                )
+
+    def remove_posts(self, post_ids):
+        with connection.cursor() as cursor:
+            self._delete_posts(cursor, post_ids)
+
+    def _delete_posts(self, cursor, post_ids):
+        """Delete rows of posts from index, returns placeholders and params of post ids for next queries"""
+        params = [Post._meta.pk.get_db_prep_value(post_id, connection) for post_id in post_ids]
+        placeholders = ', '.join(['%s'] * len(params))
+        if params:
+            cursor.execute(
+                f'DELETE FROM {self.table} WHERE post_id IN ({placeholders})',
+                params,
+            )
+        return placeholders, params
+
+    def remove_orphans(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {self.table} WHERE post_id NOT IN (SELECT id FROM posts_post)')
+
+
+backends = {
+    'postgresql': PostgresSearchBackend(),
+    'sqlite': SQLiteSearchBackend(),
+}
+
+
+def get_search_backend() -> SearchBackend:
+    """Search backend of database in use"""
+    return backends.get(connection.vendor, SearchBackend())
@@ -0,0 +1,184 @@
+import csv
+import io
+import random
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+from accounts.models import UserAccount
+from posts.models import Post, Comment
+
+WORDS = (
+    'game', 'quest', 'boss', 'raid', 'guild', 'patch', 'speedrun', 'loot', 'level', 'build', 'meta', 'server',
+    'lag', 'mod', 'co-op', 'ranked', 'shooter', 'rpg', 'strategy', 'indie', 'console', 'controller', 'stream',
+)
+
+
+class Seeder:
+    """
+    Deterministic synthetic users, posts, likes and comments for reproducing production volumes.
+    Rows are generated and written by batches, ids of users, posts and comments are made of their numbers,
+    so memory doesn't grow with amount of rows. PostgreSQL rows are written with COPY,
+    other databases use bulk_create. Users get one precomputed password hash instead of hashing per user.
+    """
+    email_domain = 'seed.test'
+    # NULL marker of COPY, empty strings stay empty strings
+    copy_null = r'\N'
+    # posts are spread over days before this date
+    last_day = date(2024, 6, 1)
+
+    def __init__(self, batch_size=10000, seed=1, password='password123', progress=None, using='default'):
+        self.batch_size = batch_size
+        self.seed = seed
+        self.password = password
+        # progress(table, written rows, all rows) is called after every batch
+        self.progress = progress
+        self.connection = connections[using]
+        self.first_user_id = None
+        self.users_count = 0
+        self.posts_count = 0
+
+    @staticmethod
+    def get_post_id(number: int) -> uuid.UUID:
+        return uuid.UUID(int=number + 1)
+
+    @staticmethod
+    def get_comment_id(number: int) -> uuid.UUID:
+        return uuid.UUID(int=(1 << 64) + number + 1)
+
+    def get_user_id(self, number: int) -> int:
+        return self.first_user_id + number
+
+    @property
+    def user_ids(self) -> range:
+        return range(self.first_user_id, self.first_user_id + self.users_count)
+
+    def is_seeded(self) -> bool:
+        return UserAccount.objects.using(self.connection.alias).filter(
+            email__endswith=f'@{self.email_domain}'
+        ).exists()
+
+    def seed_users(self, count: int):
+        """Active users 'user<number>' with default avatars"""
+        password = make_password(self.password)
+        pictures = settings.DEFAULT_PROFILE_PICS
+        last_id = UserAccount.objects.using(self.connection.alias).order_by('-pk').values_list('pk', flat=True).first()
+        self.first_user_id = (last_id or 0) + 1
+        self.users_count = count
+        self._write(UserAccount, count, lambda number: UserAccount(
+            id=self.get_user_id(number),
+            username=f'user{number}',
+            email=f'user{number}@{self.email_domain}',
+            name=f'user{number}',
+            password=password,
+            is_active=True,
+            image=f'{pictures[number % len(pictures)]}.png',
+        ))
+        # ids were set explicitly, so sequence of table is moved after them
+        with self.connection.cursor() as cursor:
+            for sql in self.connection.ops.sequence_reset_sql(no_style(), [UserAccount]):
+                cursor.execute(sql)
+
+    def seed_posts(self, count: int, days: int = 365):
+        """Posts of seeded users spread over days, newest posts have the biggest numbers"""
+        self.posts_count = count
+        first_day = self.last_day - timedelta(days=days)
+        rng = random.Random(f'{self.seed}:posts')
+
+        def make_post(number):
+            created_at = first_day + timedelta(days=number * days // count)
+            posted_at = datetime.combine(created_at, time.min, tzinfo=timezone.utc)
+            return Post(
+                id=self.get_post_id(number),
+                user_id=self.get_user_id(number % self.users_count),
+                created_at=created_at,
+                posted_at=posted_at,
+                last_activity_at=posted_at,
+                title=' '.join(rng.choices(WORDS, k=4)),
+                content=' '.join(rng.choices(WORDS, k=40)),
+                # scored by 'refresh_hot_scores' after seeding
+                score_dirty=True,
+            )
+
+        self._write(Post, count, make_post)
+
+    def seed_likes(self, count: int):
+        """Likes of posts by seeded users, every post gets the same amount of likes (+1 for first posts)"""
+        if count > self.posts_count * self.users_count:
+            raise ValueError('every user can like post only once')
+        liked_by = Post._meta.get_field('liked_by')
+        through = liked_by.remote_field.through
+        post_field = through._meta.get_field(liked_by.m2m_field_name()).attname
+        user_field = through._meta.get_field(liked_by.m2m_reverse_field_name()).attname
+        self._write(through, count, lambda number: through(**{
+            post_field: self.get_post_id(number % self.posts_count),
+            user_field: self.get_user_id(number // self.posts_count),
+        }))
+        self._set_counters('like_counter', count)
+
+    def seed_comments(self, count: int):
+        """Comments of seeded users, spread over posts like likes"""
+        rng = random.Random(f'{self.seed}:comments')
+        self._write(Comment, count, lambda number: Comment(
+            id=self.get_comment_id(number),
+            user_id=self.get_user_id(number % self.users_count),
+            user_post_id=self.get_post_id(number % self.posts_count),
+            content=' '.join(rng.choices(WORDS, k=12)),
+        ))
+        self._set_counters('comment_count', count)
+
+    def _write(self, model, count, make_object):
+        """Write 'count' objects made by number, batch by batch"""
+        for start in range(0, count, self.batch_size):
+            stop = min(start + self.batch_size, count)
+            objects = [make_object(number) for number in range(start, stop)]
+            with transaction.atomic(using=self.connection.alias):
+                if self.connection.vendor == 'postgresql':
+                    self._copy(model, objects)
+                else:
+                    model.objects.using(self.connection.alias).bulk_create(objects)
+            # with DEBUG every statement of batch is kept in queries log
+            self.connection.queries_log.clear()
+            if self.progress is not None:
+                self.progress(model._meta.db_table, stop, count)
+
+    def _copy(self, model, objects):
+        """Write objects with 'COPY ... FROM STDIN' in CSV format"""
+        fields = [field for field in model._meta.concrete_fields if not field.generated]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for obj in objects:
+            row = []
+            for field in fields:
+                value = getattr(obj, field.attname)
+                if value is None:
+                    # creation dates of comments are auto_now_add, as bulk_create sets them, other fields keep None
+                    value = field.pre_save(obj, add=True)
+                value = field.get_db_prep_save(value, self.connection)
+                row.append(self.copy_null if value is None else value)
+            writer.writerow(row)
+        buffer.seek(0)
+
+        quote = self.connection.ops.quote_name
+        columns = ', '.join(quote(field.column) for field in fields)
+        sql = f"COPY {quote(model._meta.db_table)} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '{self.copy_null}')"
+        with self.connection.cursor() as cursor:
+            if hasattr(cursor.cursor, 'copy_expert'):
+                # psycopg2
+                cursor.cursor.copy_expert(sql, buffer)
+            else:
+                with cursor.cursor.copy(sql) as copy:
+                    copy.write(buffer.getvalue())
+
+    def _set_counters(self, field: str, count: int):
+        """Set counter of seeded posts to amount of 'count' rows spread over posts by post number"""
+        posts = Post.objects.using(self.connection.alias)
+        last_post_id = self.get_post_id(self.posts_count - 1)
+        posts.filter(pk__lte=last_post_id).update(**{field: count // self.posts_count})
+        extra = count % self.posts_count
+        if extra:
+            posts.filter(pk__lte=self.get_post_id(extra - 1)).update(**{field: count // self.posts_count + 1})
@@ -1,27 +1,62 @@
 from rest_framework import serializers
 
+from app.images import process_image, get_thumbnail_urls
 from posts.models import Post, PostImage, Comment
 from posts.validators import validate_username
 
 
-class PostSerializer(serializers.ModelSerializer):
+class LikedStateMixin:
+    """adds 'is_liked' of requesting user, when view puts ids of liked objects into 'liked_ids' of context"""
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        liked_ids = self.context.get('liked_ids')
+        if liked_ids is not None:
+            data['is_liked'] = instance.pk in liked_ids
+        return data
+
+
+class PostSerializer(LikedStateMixin, serializers.ModelSerializer):
     class Meta:
         model = Post
-        fields = '__all__'
+        exclude = ('score_dirty', 'search_vector')
+
+
+class CompactPostSerializer(LikedStateMixin, serializers.ModelSerializer):
+    """post serializer without 'liked_by' array, amount of likes is in 'like_counter'"""
+    class Meta:
+        model = Post
+        exclude = ('liked_by', 'score_dirty', 'search_vector')
 
 
 class PostPicSerializer(serializers.ModelSerializer):
+    thumbnails = serializers.SerializerMethodField()
+
     class Meta:
         model = PostImage
         fields = '__all__'
 
+    def validate_image(self, value):
+        """re-encode uploaded image without metadata"""
+        return process_image(value)
+
+    def get_thumbnails(self, obj) -> dict:
+        return get_thumbnail_urls(obj.image, self.context.get('request'))
 
-class PostCommentSerializer(serializers.ModelSerializer):
+
+class PostCommentSerializer(LikedStateMixin, serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = '__all__'
 
 
+class CompactPostCommentSerializer(LikedStateMixin, serializers.ModelSerializer):
+    """comment serializer without 'liked_by' array, amount of likes is in 'like_counter'"""
+    class Meta:
+        model = Comment
+        exclude = ('liked_by',)
+
+
 class UsernameChangeSerializer(serializers.Serializer):
     """user's username serializer for UserViewSet"""
     username = serializers.CharField(max_length=150, validators=[validate_username])
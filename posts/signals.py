@@ -0,0 +1,71 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_delete
+from django.dispatch import receiver
+
+from accounts.models import Follow
+from posts.cache import response_cache
+from jobs.tasks import delete_image_files
+from posts.models import Post, PostImage, Comment
+from posts.search import get_search_backend
+from posts.tasks import fan_out_post, reindex_post
+from posts.timeline import backfill, remove_author
+
+
+@receiver([post_save, post_delete], sender=Post)
+@receiver([post_save, post_delete], sender=Comment)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    """Drop cached responses containing changed or deleted object"""
+    response_cache.invalidate(*instance.get_cache_groups())
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    """Put saved post into search index"""
+    get_search_backend().index_posts([instance.pk])
+
+
+@receiver(pre_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    """Remove post from search index, while its row still exists"""
+    get_search_backend().remove_posts([instance.pk])
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_commented_post(sender, instance, origin=None, **kwargs):
+    """
+    Queue reindexing of post of saved or deleted comment, unless comment is deleted together with post.
+    Document of post aggregates its comments, so it is rebuilt by worker, once for a burst of comments
+    """
+    origin_model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    if origin_model is not Post:
+        reindex_post.delay(post_id=str(instance.user_post_id))
+
+
+@receiver(post_delete, sender=PostImage)
+def delete_post_image_files(sender, instance, **kwargs):
+    """Queue deletion of image and its thumbnails, after deletion of row is committed"""
+    if instance.image:
+        name = instance.image.name
+        transaction.on_commit(lambda: delete_image_files.delay(name=name))
+
+
+@receiver(post_save, sender=Post)
+def fan_out_new_post(sender, instance, created, **kwargs):
+    """Queue putting new post into timelines of followers"""
+    if created:
+        fan_out_post.delay(post_id=str(instance.pk))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    """Put latest posts of followed user into timeline of follower"""
+    if created:
+        backfill(instance.follower_id, instance.following_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline(sender, instance, **kwargs):
+    """Remove posts of unfollowed user from timeline of follower"""
+    remove_author(instance.follower_id, instance.following_id)
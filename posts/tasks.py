@@ -0,0 +1,21 @@
+from jobs.queue import task
+from posts.models import Post
+from posts.search import get_search_backend
+from posts.timeline import fan_out
+
+
+@task
+def fan_out_post(post_id: str, after: int = None):
+    """Put new post into timelines of followers of author, one batch per job"""
+    post = Post.objects.select_related('user').filter(pk=post_id).first()
+    if post is None:
+        return
+    last_follower = fan_out(post, after)
+    if last_follower is not None:
+        fan_out_post.delay(post_id=post_id, after=last_follower)
+
+
+@task(unique=True)
+def reindex_post(post_id: str):
+    """Put post into search index after its comments changed, one pending job per post"""
+    get_search_backend().index_posts([post_id])
@@ -1,8 +1,12 @@
+from io import StringIO
+
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from django.core.management import call_command
 from django.urls import reverse
 
+from posts.counters import views_buffer
 from posts.models import Comment
 from posts.serializers import PostCommentSerializer
 from posts.tests.setup_fabric import SetUpFabric
@@ -72,18 +76,46 @@ class CommentsViewSetTests(APITestCase, SetUpFabric):
         self.assertEqual(Comment.objects.count(), 1)
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
 
+    def test_comment_counters(self):
+        """test: post counts its comments, drift is repaired by command"""
+        # comments of fabric are created without counting
+        call_command('reconcile_post_counters', stdout=StringIO())
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 1)
+
+        self.user1.in_test_api_auth(self.client, self.token1)
+        data = {'user': self.user1.id, 'user_post': self.post1.id, 'content': 'some_content'}
+        response = self.client.post(self.create_url, data=data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        activity_at = self.post1.last_activity_at
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 2)
+        self.assertGreater(self.post1.last_activity_at, activity_at)
+
+        self.client.delete(self.comment1_detail_url)
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 1)
+
+        Comment.objects.filter(user_post=self.post1).delete()
+        out = StringIO()
+        call_command('reconcile_post_counters', stdout=out)
+        self.assertIn('1 posts repaired', out.getvalue())
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.comment_count, 0)
+
     def test_get_by_post(self):
         """test: get all post's comments"""
 
         # post1
         response = self.client.get(self.get_by_post1_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
 
         # post2
         response = self.client.get(self.get_by_post2_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
 
     def test_like(self):
         """test: comment liking"""
@@ -101,3 +133,24 @@ class CommentsViewSetTests(APITestCase, SetUpFabric):
 
         self.assertIn(self.user1, self.comment1.liked_by.all())
         self.assertIn(self.user2, self.comment1.liked_by.all())
+
+    def test_liked_lookup(self):
+        """test: like state of comments for user"""
+        self.comment2.liked_by.add(self.user1)
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.get(reverse('comments-liked'), {'ids': f'{self.comment1.pk},{self.comment2.pk}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['liked'], [self.comment2.pk])
+
+        response = self.client.get(self.get_by_post1_url, {'with_liked': 'true'})
+        self.assertIn('is_liked', response.data['results'][0])
+
+    def test_views_counter(self):
+        """test: comment viewing"""
+        self.client.post(self.views1_url)
+        response = self.client.post(self.views1_url)
+        self.assertEqual(response.data['detail']['views count'], 2)
+
+        views_buffer.flush()
+        self.comment1.refresh_from_db()
+        self.assertEqual(self.comment1.views, 2)
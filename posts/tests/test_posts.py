@@ -1,9 +1,30 @@
+import json
+import os
+from datetime import date, datetime, timedelta, timezone
+from unittest import mock
+from io import StringIO
+
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.timezone import now
 
-from posts.models import Post
+from accounts.models import UserAccount
+from app.images import delete_thumbnails, get_thumbnail_name
+from jobs.models import Job
+from jobs.queue import run_pending
+from posts.counters import views_buffer
+from posts.management.commands.refresh_hot_scores import Command
+from posts.models import Post, PostImage, Comment
+from posts.ranking import get_hot_score
+from posts.search import SearchBackend
 from posts.serializers import PostSerializer
 from posts.tests.setup_fabric import SetUpFabric
 
@@ -29,7 +50,222 @@ class PostViewSetTests(APITestCase, SetUpFabric):
         """test: get all posts"""
         response = self.client.get(self.list_url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 4)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+
+    def test_list_cursor(self):
+        """test: scroll the feed, every post is returned once and newest first"""
+        Post.objects.bulk_create(Post(user=self.user2, title=f'title{i}', content='content') for i in range(23))
+
+        posts = []
+        response = self.client.get(self.list_url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            posts += response.data['results']
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(posts), 25)
+        self.assertEqual(len({post['id'] for post in posts}), 25)
+        keys = [(post['created_at'], post['id']) for post in posts]
+        self.assertEqual(keys, sorted(keys, reverse=True))
+
+    def test_list_by_activity(self):
+        """test: feed sorted by activity, recently commented posts first"""
+        Post.objects.filter(pk=self.post1.pk).update(last_activity_at=now() + timedelta(hours=1))
+        response = self.client.get(self.list_url, {'sort': 'activity'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post1.pk), str(self.post2.pk)])
+
+        response = self.client.get(self.list_url, {'sort': 'unknown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_hot(self):
+        """test: hot feed ranks by engagement, only changed posts are rescored"""
+        hot_url = reverse('posts-hot')
+        self.assertFalse(Post.objects.filter(score_dirty=True).exists())
+
+        # post2 has more likes
+        response = self.client.get(hot_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post2.pk), str(self.post1.pk)])
+
+        self.post1.like_by_user(self.user1)
+        self.assertTrue(Post.objects.get(pk=self.post1.pk).score_dirty)
+        Post.objects.filter(pk=self.post1.pk).update(like_counter=1000)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(Command.refresh(batch=500), 1)
+        # the only changed post is scored by one select and one update
+        statements = [query['sql'].split()[0] for query in queries if 'SAVEPOINT' not in query['sql']]
+        self.assertEqual(statements, ['SELECT', 'UPDATE'])
+
+        call_command('refresh_hot_scores', stdout=StringIO())
+        response = self.client.get(hot_url)
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post1.pk), str(self.post2.pk)])
+
+    @override_settings(TIME_ZONE='Europe/Moscow')
+    def test_created_at_local_date(self):
+        """test: new post is stored and scored with the same date of TIME_ZONE"""
+        # 23:30 UTC is the next day in Moscow
+        with mock.patch('django.utils.timezone.now', return_value=datetime(2024, 1, 1, 23, 30, tzinfo=timezone.utc)):
+            post = Post.objects.create(user=self.user1, title='title', content='content')
+        self.assertEqual(post.created_at, date(2024, 1, 2))
+        post.refresh_from_db()
+        self.assertEqual(post.created_at, date(2024, 1, 2))
+        self.assertEqual(post.hot_score, get_hot_score(post))
+
+    @override_settings(HOT_SCORE_DECAY=45000)
+    def test_hot_score_decay(self):
+        """test: age of post is counted in seconds, post newer by HOT_SCORE_DECAY needs 10 times less engagement"""
+        posted_at = datetime(2024, 6, 1, 1, 0, tzinfo=timezone.utc)
+        older = Post(like_counter=1000, comment_count=0, views=0, posted_at=posted_at)
+        newer = Post(like_counter=100, comment_count=0, views=0, posted_at=posted_at + timedelta(seconds=45000))
+        # the same day, age by date would give both posts the same bonus
+        self.assertEqual(newer.posted_at.date(), older.posted_at.date())
+        self.assertAlmostEqual(get_hot_score(newer), get_hot_score(older))
+
+    def test_search(self):
+        """test: full-text search by title, content and comments, title matches first"""
+        search_url = reverse('posts-search')
+        in_content = Post.objects.create(user=self.user1, title='news', content='new dragon quest announced')
+        in_title = Post.objects.create(user=self.user1, title='Dragon quest review', content='long text')
+        in_comment = Post.objects.create(user=self.user2, title='screenshot', content='look')
+        Comment.objects.create(user=self.user1, user_post=in_comment, content='is it dragon quest?')
+
+        response = self.client.get(search_url, {'q': 'Dragon Quest'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ids = [post['id'] for post in response.data['results']]
+        self.assertEqual(ids, [str(in_title.pk), str(in_content.pk), str(in_comment.pk)])
+        self.assertIsNone(response.data['next'])
+
+        in_title.delete()
+        Comment.objects.filter(user_post=in_comment).delete()
+        in_content.title = 'unrelated'
+        in_content.content = 'unrelated'
+        in_content.save()
+        response = self.client.get(search_url, {'q': 'dragon'})
+        self.assertEqual(response.data['results'], [])
+
+        call_command('rebuild_search_index', stdout=StringIO())
+        response = self.client.get(search_url, {'q': 'testing'})
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post2.pk)])
+
+        # query syntax of user is not interpreted
+        response = self.client.get(search_url, {'q': 'testing" OR "title'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
+
+        self.assertEqual(self.client.get(search_url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(search_url, {'q': 'a', 'page': 0}).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_search_rowids_changed(self):
+        """test: SQLite index is linked to posts by id, so renumbered rowids of posts table don't break search"""
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 index of SQLite')
+        with connection.cursor() as cursor:
+            # as table rebuild of migration or VACUUM may do
+            cursor.execute('UPDATE posts_post SET rowid = rowid + 1000')
+        response = self.client.get(reverse('posts-search'), {'q': 'testing'})
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post2.pk)])
+
+        self.post2.delete()
+        self.assertEqual(self.client.get(reverse('posts-search'), {'q': 'testing'}).data['results'], [])
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT count(*) FROM posts_post_fts')
+            self.assertEqual(cursor.fetchone()[0], 1)
+
+    @override_settings(JOBS_ALWAYS_EAGER=False)
+    def test_search_comments_reindex(self):
+        """test: comments of post are reindexed by one queued job, however many comments are written"""
+        search_url = reverse('posts-search')
+        for number in range(3):
+            Comment.objects.create(user=self.user1, user_post=self.post1, content=f'dragon quest {number}')
+        self.assertEqual(Job.objects.filter(name='posts.tasks.reindex_post').count(), 1)
+        self.assertEqual(self.client.get(search_url, {'q': 'dragon'}).data['results'], [])
+
+        run_pending()
+        response = self.client.get(search_url, {'q': 'dragon'})
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post1.pk)])
+
+    @override_settings(SEARCH_COMMENTS_MAX_LENGTH=30)
+    def test_search_comments_limit(self):
+        """test: comments over the limit of indexed text are not indexed, post is still written"""
+        search_url = reverse('posts-search')
+        first = Comment.objects.create(user=self.user1, user_post=self.post1, content='first comment about dragons')
+        Comment.objects.filter(pk=first.pk).update(created_at=first.created_at - timedelta(days=1))
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.post(
+            reverse('comments-list'), {'user': self.user1.pk, 'user_post': self.post1.pk, 'content': 'latecomer ' * 100}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get(search_url, {'q': 'dragons'})
+        self.assertEqual([post['id'] for post in response.data['results']], [str(self.post1.pk)])
+        self.assertEqual(self.client.get(search_url, {'q': 'latecomer'}).data['results'], [])
+
+    def test_search_without_index(self):
+        """test: base backend of other databases scans posts and comments, newest matches first"""
+        in_content = Post.objects.create(user=self.user1, title='news', content='new dragon quest announced')
+        in_comment = Post.objects.create(user=self.user2, title='screenshot', content='look')
+        Comment.objects.create(user=self.user1, user_post=in_comment, content='is it Dragon Quest?')
+
+        posts = SearchBackend().search(Post.objects.all(), 'dragon quest', 0, 10)
+        self.assertEqual(set(posts), {in_content, in_comment})
+        self.assertEqual(SearchBackend().search(Post.objects.all(), ' ', 0, 10), [])
+
+    def test_list_num_queries(self):
+        """test: page of posts costs the same number of queries however many posts and likes there are"""
+        posts = Post.objects.bulk_create(
+            Post(user=self.user1, title=f'title{i}', content='content') for i in range(20)
+        )
+        for post in posts:
+            post.liked_by.add(self.user1, self.user2)
+
+        # page and prefetch of 'liked_by' ids
+        with self.assertNumQueries(2):
+            response = self.client.get(self.list_url)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all('liked_by' in post for post in response.data['results']))
+
+        # deep pages cost the same
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 10)
+
+        # page only
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, {'compact': 'true'})
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertTrue(all('liked_by' not in post for post in response.data['results']))
+
+    def test_response_cache(self):
+        """test: anonymous reads are cached and invalidated by changes, likes invalidate details only"""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):
+            response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+        self.post1.title = 'new title'
+        self.post1.save()
+        response = self.client.get(self.list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertIn('new title', [post['title'] for post in response.data['results']])
+
+        response = self.client.get(self.post2_detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.post2.like_by_user(self.user1)
+        response = self.client.get(self.post2_detail_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['liked_by'], [self.user1.id])
+        # like doesn't flush feed pages
+        self.assertEqual(self.client.get(self.list_url)['X-Cache'], 'HIT')
+
+        # authenticated users get fresh data
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.get(self.post2_detail_url)
+        self.assertNotIn('X-Cache', response)
 
     def test_detail(self):
         """test: get post1 by id"""
@@ -80,14 +316,48 @@ class PostViewSetTests(APITestCase, SetUpFabric):
         """test: get all user's posts"""
         # user1
         response = self.client.get(self.get_by_user1_url)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
         # user2
         response = self.client.get(self.get_by_user2_url)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data['results']), 1)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_get_by_user_cursor(self):
+        """test: scroll all user's posts with keyset pagination"""
+        Post.objects.bulk_create(Post(user=self.user1, title=f'title{i}', content='content') for i in range(24))
+
+        ids = []
+        response = self.client.get(self.get_by_user1_url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                break
+            response = self.client.get(response.data['next'])
+
+        self.assertEqual(len(ids), 25)
+        self.assertEqual(len(set(ids)), 25)
+
+        response = self.client.get(self.get_by_user1_url, {'cursor': 'broken'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_get_by_user_stream(self):
+        """test: export all user's posts as streamed JSON array"""
+        Post.objects.bulk_create(Post(user=self.user1, title=f'title{i}', content='content') for i in range(24))
+
+        response = self.client.get(self.get_by_user1_url, {'stream': 'true', 'compact': 'true'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        posts = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(posts), 25)
+        self.assertNotIn('liked_by', posts[0])
+
+        response = self.client.get(self.get_by_user2_url, {'stream': 'true'})
+        self.assertEqual(len(json.loads(b''.join(response.streaming_content))), 1)
+
     def test_like(self):
         """test: post liking"""
         # user1
@@ -105,6 +375,73 @@ class PostViewSetTests(APITestCase, SetUpFabric):
         self.assertIn(self.user1, self.post1.liked_by.all())
         self.assertIn(self.user2, self.post1.liked_by.all())
 
+    def test_like_constant_queries(self):
+        """test: like toggle costs the same number of queries however many likes post has"""
+        with CaptureQueriesContext(connection) as few_likes:
+            self.post1.like_by_user(self.user1)
+        self.post1.like_by_user(self.user1)
+
+        likers = UserAccount.objects.bulk_create(
+            UserAccount(username=f'liker{i}', email=f'liker{i}@a.com', name=f'liker{i}') for i in range(50)
+        )
+        self.post1.liked_by.add(*likers)
+        with CaptureQueriesContext(connection) as many_likes:
+            message, like_counter = self.post1.like_by_user(self.user1)
+
+        self.assertEqual(len(few_likes), len(many_likes))
+        self.assertEqual(message, 'liked')
+        self.assertEqual(like_counter, 124)
+
+        message, like_counter = self.post1.like_by_user(self.user1)
+        self.assertEqual(message, 'like removed')
+        self.assertEqual(like_counter, 123)
+
+    def test_liked_lookup(self):
+        """test: like state of many posts is looked up with constant number of queries"""
+        posts = Post.objects.bulk_create(Post(user=self.user2, title=f'title{i}', content='c') for i in range(20))
+        for post in posts[::2]:
+            post.liked_by.add(self.user1)
+        self.post2.liked_by.add(self.user2)
+        liked_url = reverse('posts-liked')
+
+        response = self.client.get(liked_url, {'ids': str(posts[0].pk)})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.get(liked_url, {'ids': str(posts[0].pk)})
+        self.assertEqual(response.data['liked'], [posts[0].pk])
+
+        # user is cached by now, so the only query is the lookup
+        ids = [post.pk for post in reversed(posts)] + [self.post2.pk]
+        with self.assertNumQueries(1):
+            response = self.client.get(liked_url, {'ids': ','.join(str(pk) for pk in ids)})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['liked'], [post.pk for post in reversed(posts[::2])])
+
+        response = self.client.get(liked_url, {'ids': 'not-uuid'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        with self.settings(LIKED_LOOKUP_MAX_IDS=5):
+            response = self.client.get(liked_url, {'ids': ','.join(str(pk) for pk in ids)})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_with_liked(self):
+        """test: 'is_liked' field is added to posts only on request"""
+        self.post1.liked_by.add(self.user1)
+        self.user1.in_test_api_auth(self.client, self.token1)
+
+        response = self.client.get(self.list_url)
+        self.assertNotIn('is_liked', response.data['results'][0])
+
+        response = self.client.get(self.list_url, {'with_liked': 'true', 'compact': 'true'})
+        is_liked = {post['id']: post['is_liked'] for post in response.data['results']}
+        self.assertEqual(is_liked, {str(self.post1.pk): True, str(self.post2.pk): False})
+
+        response = self.client.get(self.post2_detail_url, {'with_liked': 'true'})
+        self.assertFalse(response.data['is_liked'])
+
+        response = self.client.get(self.get_by_user1_url, {'with_liked': 'true', 'stream': 'true'})
+        self.assertTrue(json.loads(b''.join(response.streaming_content))[0]['is_liked'])
+
     def test_views_counter(self):
         """test: post viewing"""
         # user1
@@ -115,8 +452,70 @@ class PostViewSetTests(APITestCase, SetUpFabric):
         self.user2.in_test_api_auth(self.client, self.token2)
         self.client.post(self.views2_url)
 
+        views_buffer.flush()
         self.post1.refresh_from_db()
         self.post2.refresh_from_db()
 
         self.assertEqual(self.post1.views, 1)
         self.assertEqual(self.post2.views, 1)
+
+    def test_views_counter_buffered(self):
+        """test: views are written to database only on flush, but counted in response"""
+        for _ in range(3):
+            response = self.client.post(self.views1_url)
+        self.assertEqual(response.data['detail']['views count'], 3)
+
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.views, 0)
+
+        with self.assertNumQueries(1):
+            views_buffer.flush()
+        self.post1.refresh_from_db()
+        self.assertEqual(self.post1.views, 3)
+
+        response = self.client.post(self.views1_url)
+        self.assertEqual(response.data['detail']['views count'], 4)
+        views_buffer.flush()
+
+
+class PostImageTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        self.setup_users()
+        self.setup_posts()
+
+    def get_image_file(self):
+        image_path = os.path.join(os.path.dirname(__file__), 'files', 'test_image.jpg')
+        with open(image_path, 'rb') as img:
+            return SimpleUploadedFile('test_image.jpg', img.read(), content_type='image/jpeg')
+
+    def get_files(self, name):
+        return [name] + [get_thumbnail_name(name, size_name) for size_name in settings.IMAGE_THUMBNAIL_SIZES]
+
+    def test_files_deleted(self):
+        """test: files of replaced and deleted image are deleted after commit"""
+        post_image = PostImage.objects.create(user_post=self.post1, image=self.get_image_file())
+        storage = post_image.image.storage
+        old_name = post_image.image.name
+        new_name = None
+        try:
+            self.assertTrue(all(storage.exists(name) for name in self.get_files(old_name)))
+
+            with self.captureOnCommitCallbacks() as callbacks:
+                post_image.image = self.get_image_file()
+                post_image.save()
+            new_name = post_image.image.name
+            self.assertTrue(storage.exists(old_name))
+            for callback in callbacks:
+                callback()
+            self.assertFalse(any(storage.exists(name) for name in self.get_files(old_name)))
+            self.assertTrue(all(storage.exists(name) for name in self.get_files(new_name)))
+
+            with self.captureOnCommitCallbacks(execute=True):
+                self.post1.delete()
+            self.assertFalse(any(storage.exists(name) for name in self.get_files(new_name)))
+        finally:
+            for name in (old_name, new_name):
+                if name:
+                    storage.delete(name)
+                    delete_thumbnails(storage, name)
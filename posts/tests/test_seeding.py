@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Count, F, Sum
+from django.test import TestCase
+
+from accounts.models import UserAccount
+from posts.models import Post, Comment
+from posts.seeding import Seeder
+from posts.tests.setup_fabric import SetUpFabric
+
+
+class SeederTests(TestCase):
+    def test_counters(self):
+        """test: bulk seeded counters match seeded likes and comments"""
+        seeder = Seeder(batch_size=7)
+        seeder.seed_users(10)
+        seeder.seed_posts(30, days=3)
+        seeder.seed_likes(95)
+        seeder.seed_comments(40)
+
+        self.assertEqual(UserAccount.objects.filter(email__endswith=f'@{Seeder.email_domain}').count(), 10)
+        self.assertEqual(Post.liked_by.through.objects.count(), 95)
+        self.assertEqual(Comment.objects.count(), 40)
+        self.assertEqual(Post.objects.aggregate(Sum('like_counter'))['like_counter__sum'], 95)
+        self.assertFalse(Post.objects.annotate(likes=Count('liked_by')).exclude(like_counter=F('likes')).exists())
+        self.assertFalse(Post.objects.annotate(comments=Count('comment')).exclude(comment_count=F('comments')).exists())
+        self.assertEqual(Post.objects.values('created_at').distinct().count(), 3)
+        # newest posts have the biggest numbers
+        newest = Post.objects.order_by('-created_at', '-id').first()
+        self.assertEqual(newest.pk, Seeder.get_post_id(29))
+
+
+class SeedCommandTests(TestCase, SetUpFabric):
+    def test_seed(self):
+        """test: seed command writes requested rows after existing users, second run is refused"""
+        self.setup_users()
+        out = StringIO()
+        call_command('seed', users=5, posts=12, likes=50, comments=20, days=4, batch=7, stdout=out)
+
+        seeded_users = UserAccount.objects.filter(email__endswith=f'@{Seeder.email_domain}')
+        self.assertEqual(seeded_users.count(), 5)
+        self.assertEqual(Post.objects.count(), 12)
+        self.assertEqual(Post.liked_by.through.objects.count(), 50)
+        self.assertEqual(Comment.objects.count(), 20)
+        self.assertFalse(Post.objects.annotate(likes=Count('liked_by')).exclude(like_counter=F('likes')).exists())
+        self.assertEqual(Post.objects.values('created_at').distinct().count(), 4)
+        self.assertTrue(seeded_users.get(username='user0').check_password('password123'))
+        self.assertIn('posts_post: 12/12', out.getvalue())
+        # sequence of users continues after seeded ids
+        user = UserAccount.objects.create_user(email='after@seed.com', username='after', password='password123')
+        self.assertGreater(user.pk, seeded_users.order_by('-pk').first().pk)
+
+        with self.assertRaises(CommandError):
+            call_command('seed', users=5, posts=12, likes=0, comments=0, stdout=StringIO())
+
+    def test_deterministic(self):
+        """test: the same seed generates the same texts"""
+        call_command('seed', users=3, posts=5, likes=0, comments=5, seed=7, stdout=StringIO())
+        titles = list(Post.objects.order_by('pk').values_list('title', 'created_at'))
+        comments = list(Comment.objects.order_by('pk').values_list('content', flat=True))
+        Post.objects.all().delete()
+        UserAccount.objects.all().delete()
+
+        call_command('seed', users=3, posts=5, likes=0, comments=5, seed=7, stdout=StringIO())
+        self.assertEqual(list(Post.objects.order_by('pk').values_list('title', 'created_at')), titles)
+        self.assertEqual(list(Comment.objects.order_by('pk').values_list('content', flat=True)), comments)
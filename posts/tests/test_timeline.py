@@ -0,0 +1,89 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.test import override_settings
+from django.urls import reverse
+
+from accounts.models import UserAccount
+from posts.models import Post, TimelineEntry
+from posts.tests.setup_fabric import SetUpFabric
+
+
+class TimelineTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        self.setup_users()
+        self.setup_posts()
+        self.setup_tokens()
+
+        self.timeline_url = reverse('posts-timeline')
+        self.follow_user2_url = reverse('users-follow', kwargs={'pk': self.user2.pk})
+        self.user1.in_test_api_auth(self.client, self.token1)
+
+    def get_timeline_ids(self):
+        """scroll whole timeline of user1"""
+        ids = []
+        response = self.client.get(self.timeline_url)
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [post['id'] for post in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    @staticmethod
+    def feed_order(posts):
+        """ids of posts in order of feed keys, newest first"""
+        return [str(post.pk) for post in sorted(posts, key=lambda post: (post.created_at, post.pk), reverse=True)]
+
+    def test_fan_out(self):
+        """test: posts of followed users and own posts are in timeline, newest first"""
+        self.assertEqual(self.get_timeline_ids(), [str(self.post1.pk)])
+
+        # latest posts of followed user are put into timeline at once
+        self.client.post(self.follow_user2_url)
+        self.assertEqual(self.get_timeline_ids(), self.feed_order([self.post1, self.post2]))
+
+        posts = [Post.objects.create(user=self.user2, title=f'title{i}', content='content') for i in range(12)]
+        self.assertEqual(self.get_timeline_ids(), self.feed_order([*posts, self.post1, self.post2]))
+
+        # timeline is one range read, posts are loaded by primary key
+        with self.assertNumQueries(4):
+            # entries, followed celebrities, posts, prefetched likes
+            self.client.get(self.timeline_url)
+
+        self.client.post(self.follow_user2_url)
+        self.assertEqual(self.get_timeline_ids(), [str(self.post1.pk)])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0, TIMELINE_BACKFILL=0)
+    def test_celebrity(self):
+        """test: posts of users with many followers are not fanned out, they are merged on read"""
+        self.client.post(self.follow_user2_url)
+        posts = [Post.objects.create(user=self.user2, title=f'title{i}', content='content') for i in range(12)]
+        self.assertFalse(TimelineEntry.objects.filter(user=self.user1, author=self.user2).exists())
+
+        self.assertEqual(self.get_timeline_ids(), self.feed_order([*posts, self.post1, self.post2]))
+
+    @override_settings(TIMELINE_FANOUT_BATCH=2)
+    def test_fan_out_batches(self):
+        """test: fan-out to many followers is done by batches"""
+        followers = UserAccount.objects.bulk_create(
+            UserAccount(username=f'fan{i}', email=f'fan{i}@a.com', name=f'fan{i}') for i in range(5)
+        )
+        for follower in followers:
+            follower.toggle_follow(self.user1)
+
+        post = Post.objects.create(user=self.user1, title='title', content='content')
+        self.assertEqual(TimelineEntry.objects.filter(post=post).count(), 6)
+
+    def test_timeline_requires_auth(self):
+        """test: anonymous user has no timeline"""
+        self.client.credentials()
+        self.assertEqual(self.client.get(self.timeline_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_USER_FOR_READS=True, TIMELINE_FANOUT_LIMIT=0, TIMELINE_BACKFILL=0)
+    def test_token_user(self):
+        """test: timeline is read for TokenUser of safe requests, stored and celebrity posts are merged"""
+        self.client.post(self.follow_user2_url)
+        posts = [Post.objects.create(user=self.user2, title=f'title{i}', content='content') for i in range(3)]
+        self.assertEqual(self.get_timeline_ids(), self.feed_order([*posts, self.post1, self.post2]))
@@ -1,12 +1,20 @@
 import os
 
+from PIL import Image
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
 from django.urls import reverse
 from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 
+from accounts.authentication import CachedJWTAuthentication, get_user_cache_key
 from accounts.serializers import CustomUserCreateSerializer
+from app.images import delete_thumbnails, get_thumbnail_name
 from app.utils import is_not_default_pic
 from posts.tests.setup_fabric import SetUpFabric
 
@@ -25,6 +33,24 @@ class UsersViewSetTests(APITestCase, SetUpFabric):
 
         self.user1_change_avatar_url = reverse('users-change-avatar', kwargs={'pk': self.user1.pk})
         self.user2_change_avatar_url = reverse('users-change-avatar', kwargs={'pk': self.user2.pk})
+        self.user1_avatar_url = self.user1_change_avatar_url
+
+    def test_follow(self):
+        """test: following and unfollowing user"""
+        follow_url = reverse('users-follow', kwargs={'pk': self.user2.pk})
+        self.assertEqual(self.client.post(follow_url).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.post(follow_url)
+        self.assertEqual(response.data['message'], 'followed')
+        self.assertEqual(response.data['followers_count'], 1)
+
+        response = self.client.post(follow_url)
+        self.assertEqual(response.data['message'], 'unfollowed')
+        self.assertEqual(response.data['followers_count'], 0)
+
+        response = self.client.post(reverse('users-follow', kwargs={'pk': self.user1.pk}))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
     def test_detail(self):
         """test: get users by id"""
@@ -86,3 +112,159 @@ class UsersViewSetTests(APITestCase, SetUpFabric):
             temp_path = self.user1.image.path
             if is_not_default_pic(temp_path):
                 os.remove(temp_path)
+                delete_thumbnails(self.user1.image.storage, self.user1.image.name)
+
+    def test_cached_authentication(self):
+        """test: authenticated user is loaded from database once and reloaded after changes"""
+        self.user1.in_test_api_auth(self.client, self.token1)
+        with CaptureQueriesContext(connection) as first_request:
+            self.client.get(self.user2_detail_url)
+        with CaptureQueriesContext(connection) as cached_request:
+            response = self.client.get(self.user2_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(first_request) - 1, len(cached_request))
+
+        # password hash is not cached, other fields of cached user are loaded on access
+        cached = caches[settings.AUTH_USER_CACHE_ALIAS].get(get_user_cache_key(self.user1.pk))
+        self.assertNotIn(self.user1.password, repr(cached))
+        user = CachedJWTAuthentication().load_user(cached[0])
+        self.assertEqual((user.pk, user.username), (self.user1.pk, self.user1.username))
+        self.assertEqual(user.email, self.user1.email)
+        password = self.user1.password
+        user.name = 'renamed'
+        user.save()
+        # deferred password is not overwritten by save
+        self.user1.refresh_from_db()
+        self.assertEqual((self.user1.name, self.user1.password), ('renamed', password))
+
+        # deactivated user is dropped from cache and is not authenticated anymore
+        self.user1.is_active = False
+        self.user1.save()
+        response = self.client.get(self.user2_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_TOKEN_USER_FOR_READS=True)
+    def test_token_user_for_reads(self):
+        """test: safe requests get user from token claims without database"""
+        self.user1.in_test_api_auth(self.client, self.token1)
+        with self.assertNumQueries(1):
+            response = self.client.get(self.user2_detail_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_get_avatar(self):
+        """test: download user's avatar with conditional and range requests"""
+        response = self.client.get(self.user1_avatar_url)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        image_path = os.path.join(os.path.dirname(__file__), 'files', 'test_image.jpg')
+        with open(image_path, 'rb') as img:
+            self.user1.set_image(SimpleUploadedFile('test_image.jpg', img.read(), content_type='image/jpeg'))
+        with self.user1.image.open('rb') as img:
+            image_data = img.read()
+
+        try:
+            response = self.client.get(self.user1_avatar_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'image/webp')
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertEqual(b''.join(response.streaming_content), image_data)
+
+            response = self.client.get(self.user1_avatar_url, HTTP_IF_NONE_MATCH=response['ETag'])
+            self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+            response = self.client.get(self.user1_avatar_url, HTTP_RANGE='bytes=10-19')
+            self.assertEqual(response.status_code, status.HTTP_206_PARTIAL_CONTENT)
+            self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(image_data)}')
+            self.assertEqual(b''.join(response.streaming_content), image_data[10:20])
+
+            response = self.client.get(self.user1_avatar_url, HTTP_RANGE=f'bytes={len(image_data)}-')
+            self.assertEqual(response.status_code, status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+
+            with override_settings(FILE_SENDFILE_HEADER='X-Accel-Redirect'):
+                response = self.client.get(self.user1_avatar_url)
+            self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.user1.image.name)
+            self.assertEqual(response.content, b'')
+        finally:
+            os.remove(self.user1.image.path)
+            delete_thumbnails(self.user1.image.storage, self.user1.image.name)
+
+    def test_avatar_processing(self):
+        """test: uploaded avatar is re-encoded without metadata and gets thumbnails"""
+        image_path = os.path.join(os.path.dirname(__file__), 'files', 'test_image.jpg')
+        with open(image_path, 'rb') as img:
+            uploaded_image = SimpleUploadedFile('test_image.jpg', img.read(), content_type='image/jpeg')
+        self.user1.in_test_api_auth(self.client, self.token1)
+        response = self.client.post(self.user1_change_avatar_url, {'avatar': uploaded_image}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.user1.refresh_from_db()
+        storage = self.user1.image.storage
+        try:
+            self.assertTrue(self.user1.image.name.endswith('.webp'))
+            with Image.open(self.user1.image.path) as image:
+                self.assertEqual(image.format, 'WEBP')
+                self.assertNotIn('exif', image.info)
+
+            thumbnails = self.client.get(self.user1_detail_url).data['thumbnails']
+            self.assertEqual(set(thumbnails), set(settings.IMAGE_THUMBNAIL_SIZES))
+            for size_name, size in settings.IMAGE_THUMBNAIL_SIZES.items():
+                with storage.open(get_thumbnail_name(self.user1.image.name, size_name)) as file:
+                    with Image.open(file) as thumbnail:
+                        self.assertLessEqual(max(thumbnail.size), size)
+        finally:
+            storage.delete(self.user1.image.name)
+            delete_thumbnails(storage, self.user1.image.name)
+
+        not_image = SimpleUploadedFile('avatar.jpg', b'not an image', content_type='image/jpeg')
+        response = self.client.post(self.user1_change_avatar_url, {'avatar': not_image}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_avatar_replace(self):
+        """test: files of replaced avatar are deleted after the new one is committed"""
+        image_path = os.path.join(os.path.dirname(__file__), 'files', 'test_image.jpg')
+        with open(image_path, 'rb') as img:
+            image_data = img.read()
+        self.user1.set_image(SimpleUploadedFile('test_image.jpg', image_data, content_type='image/jpeg'))
+        storage = self.user1.image.storage
+        old_name = self.user1.image.name
+        try:
+            with self.captureOnCommitCallbacks() as callbacks:
+                self.user1.set_image(SimpleUploadedFile('test_image.jpg', image_data, content_type='image/jpeg'))
+            # nothing is deleted before commit
+            self.assertTrue(storage.exists(old_name))
+            for callback in callbacks:
+                callback()
+            self.assertFalse(storage.exists(old_name))
+            for size_name in settings.IMAGE_THUMBNAIL_SIZES:
+                self.assertFalse(storage.exists(get_thumbnail_name(old_name, size_name)))
+        finally:
+            for name in (old_name, self.user1.image.name):
+                storage.delete(name)
+                delete_thumbnails(storage, name)
+
+
+class LoginTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        self.setup_users()
+        # hashed by MD5PasswordHasher of test settings
+        self.user1.set_password('password123')
+        self.user1.save()
+        self.login_url = reverse('jwt-create')
+
+    @override_settings(PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.MD5PasswordHasher',
+    ])
+    def test_rehash_on_login(self):
+        """test: password of not preferred hasher is rehashed by preferred one on successful login only"""
+        response = self.client.post(self.login_url, {'email': 'a@a.com', 'password': 'wrong-password'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.user1.refresh_from_db()
+        self.assertTrue(self.user1.password.startswith('md5$'))
+
+        response = self.client.post(self.login_url, {'email': 'a@a.com', 'password': 'password123'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user1.refresh_from_db()
+        self.assertTrue(self.user1.password.startswith('scrypt$'))
+        self.assertTrue(self.user1.check_password('password123'))
@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.db.models import Q
+
+from accounts.models import Follow
+from posts.models import Post, TimelineEntry
+
+
+def is_celebrity(user) -> bool:
+    """Posts of users with many followers are not fanned out, they are merged into timelines on read"""
+    return user.followers_count > settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out(post: Post, after=None):
+    """
+    Put post into timelines of one batch of author's followers, following ones with id greater than 'after'.
+    First batch also puts post into timeline of author. Returns id to continue from, or None after last batch.
+    """
+    author = post.user
+    user_ids = []
+    if after is None:
+        user_ids.append(author.pk)
+
+    last_follower = None
+    if not is_celebrity(author):
+        batch_size = settings.TIMELINE_FANOUT_BATCH
+        followers = Follow.objects.filter(following=author).order_by('follower_id')
+        if after is not None:
+            followers = followers.filter(follower_id__gt=after)
+        follower_ids = list(followers.values_list('follower_id', flat=True)[:batch_size])
+        user_ids += follower_ids
+        if len(follower_ids) == batch_size:
+            last_follower = follower_ids[-1]
+
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, post=post, author=author, created_at=post.created_at) for user_id in user_ids],
+        ignore_conflicts=True,
+    )
+    return last_follower
+
+
+def backfill(follower_id, following_id):
+    """Put latest posts of followed user into timeline of follower"""
+    posts = (
+        Post.objects.filter(user=following_id).order_by('-created_at', '-id')
+        .values_list('id', 'created_at')[:settings.TIMELINE_BACKFILL]
+    )
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=follower_id, post_id=post_id, author_id=following_id, created_at=created_at)
+         for post_id, created_at in posts],
+        ignore_conflicts=True,
+    )
+
+
+def remove_author(follower_id, following_id):
+    """Remove posts of unfollowed user from timeline of follower"""
+    TimelineEntry.objects.filter(user=follower_id, author=following_id).delete()
+
+
+def _before(position, date_field, id_field):
+    """Condition of keys older than (created_at, id) position"""
+    created_at, pk = position
+    return Q(**{f'{date_field}__lt': created_at}) | Q(**{date_field: created_at, f'{id_field}__lt': pk})
+
+
+def get_timeline(user_id, queryset, position, limit: int) -> list:
+    """
+    Posts of home timeline of user from queryset, newest first, older than (created_at, id) position if given.
+    Stored timeline is one range of timeline index, posts of followed celebrities are merged into it.
+    """
+    entries = TimelineEntry.objects.filter(user_id=user_id).order_by('-created_at', '-post_id')
+    if position is not None:
+        entries = entries.filter(_before(position, 'created_at', 'post_id'))
+    keys = {post_id: created_at for post_id, created_at in entries.values_list('post_id', 'created_at')[:limit]}
+
+    posts = {}
+    celebrities = list(
+        Follow.objects.filter(follower_id=user_id, following__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT)
+        .values_list('following_id', flat=True)
+    )
+    if celebrities:
+        celebrity_posts = queryset.filter(user__in=celebrities).order_by('-created_at', '-id')
+        if position is not None:
+            celebrity_posts = celebrity_posts.filter(_before(position, 'created_at', 'id'))
+        for post in celebrity_posts[:limit]:
+            posts[post.pk] = post
+            keys[post.pk] = post.created_at
+
+    page = sorted(keys, key=lambda post_id: (keys[post_id], post_id), reverse=True)[:limit]
+    posts.update(queryset.order_by().in_bulk([post_id for post_id in page if post_id not in posts]))
+    return [posts[post_id] for post_id in page if post_id in posts]
@@ -1,14 +1,22 @@
 from rest_framework.decorators import action
 from rest_framework import viewsets, status, mixins
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.exceptions import ValidationError as APIValidationError
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
 
-from django.http import HttpResponse
+from django.core.exceptions import ValidationError
+from django.db import transaction
 
 from accounts.serializers import CustomUserCreateSerializer
-from posts.serializers import PostSerializer, PostPicSerializer, PostCommentSerializer, UsernameChangeSerializer
+from posts.serializers import (PostSerializer, CompactPostSerializer, PostPicSerializer, PostCommentSerializer,
+                               CompactPostCommentSerializer, UsernameChangeSerializer)
 from posts.models import UserAccount, Post, PostImage, Comment
-from posts.mixins import LikeMixin, ViewsCounterMixin
+from posts.mixins import LikeMixin, ViewsCounterMixin, CompactModeMixin, PaginatedActionMixin
+from posts.pagination import (PostCursorPagination, PostActivityCursorPagination, PostHotCursorPagination,
+                              TimelineCursorPagination, CommentCursorPagination, SearchPagination)
+from posts.search import get_search_backend
+from posts.cache import cache_response
+from posts.responses import file_response
 from app.permissions import IsOwnerOrReadOnly
 
 
@@ -18,6 +26,8 @@ class UserViewSet(mixins.RetrieveModelMixin,
     queryset = UserAccount.objects.all()
     serializer_class = CustomUserCreateSerializer
     permission_classes = (IsAuthenticatedOrReadOnly,)
+    # rate of avatar uploads is set by its own scope, see app.throttling
+    throttle_scope = None
 
     @action(detail=True, methods=['post'], url_path='username')
     def change_username(self, request, pk=None):
@@ -48,7 +58,21 @@ class UserViewSet(mixins.RetrieveModelMixin,
                 return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
         return Response(status=status.HTTP_403_FORBIDDEN)
 
-    @action(detail=True, methods=['get', 'post'], url_path='avatar')
+    @action(detail=True, methods=['post'], permission_classes=[IsAuthenticated])
+    def follow(self, request, pk=None):
+        """
+        Following user or unfollowing if user is already followed
+        api/v1/users/<user_id>/follow/
+        Methods: POST
+        Headers - {Authorization: JWT <access token>}
+        """
+        user = self.get_object()
+        if user.id == request.user.id:
+            return Response({'detail': 'You can not follow yourself'}, status=status.HTTP_400_BAD_REQUEST)
+        message, followers_count = request.user.toggle_follow(user)
+        return Response({'status': 'success', 'message': message, 'followers_count': followers_count})
+
+    @action(detail=True, methods=['get', 'post'], url_path='avatar', throttle_scope='avatar')
     def change_avatar(self, request, pk=None):
         """
         Allow to post user's avatar or get user avatar, if user already have non default avatar, it will be deleted
@@ -63,6 +87,11 @@ class UserViewSet(mixins.RetrieveModelMixin,
                     **form-data**
                     "avatar": <avatar-file> (type file)
                 }
+        if GET:
+            Headers - {
+                    Range: bytes=<start>-<end> (optional, partial content)
+                    If-None-Match: <etag> (optional, 304 if avatar is not changed)
+                }
         """
         user = self.get_object()
 
@@ -71,7 +100,10 @@ class UserViewSet(mixins.RetrieveModelMixin,
                 file = request.FILES.get('avatar')
                 if not file:
                     return Response({"detail": "No file provided"}, status=status.HTTP_400_BAD_REQUEST)
-                user.set_image(file)
+                try:
+                    user.set_image(file)
+                except ValidationError as err:
+                    return Response({"detail": err.messages}, status=status.HTTP_400_BAD_REQUEST)
                 return Response({"detail": "avatar set"}, status=status.HTTP_201_CREATED)
             return Response({"detail": "Bad request"}, status=status.HTTP_403_FORBIDDEN)
 
@@ -79,9 +111,7 @@ class UserViewSet(mixins.RetrieveModelMixin,
             image = user.get_image()
             if not image:
                 return Response({"detail": "No image found"}, status=status.HTTP_404_NOT_FOUND)
-            response = HttpResponse(image, content_type='image/jpeg')
-            response['Content-Disposition'] = f'attachment; filename="{image.name}"'
-            return response
+            return file_response(request, image)
 
 
 class PostViewSet(mixins.CreateModelMixin,
@@ -91,12 +121,58 @@ class PostViewSet(mixins.CreateModelMixin,
                   mixins.ListModelMixin,
                   viewsets.GenericViewSet,
                   ViewsCounterMixin,
-                  LikeMixin
+                  LikeMixin,
+                  CompactModeMixin,
+                  PaginatedActionMixin
                   ):
     queryset = Post.objects.all()
     serializer_class = PostSerializer
+    compact_serializer_class = CompactPostSerializer
+    prefetch_actions = ('list', 'retrieve', 'get_by_user', 'hot', 'search', 'timeline')
+    pagination_class = PostCursorPagination
+    # feed orders, ?sort=<name>
+    sort_pagination_classes = {
+        'newest': PostCursorPagination,
+        'activity': PostActivityCursorPagination,
+    }
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly,)
 
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.action == 'list':
+            sort = self.request.query_params.get('sort', 'newest')
+            if sort not in self.sort_pagination_classes:
+                raise APIValidationError({'sort': f'Choose one of: {", ".join(self.sort_pagination_classes)}.'})
+            self._paginator = self.sort_pagination_classes[sort]()
+        return super().paginator
+
+    def get_cache_groups(self):
+        """Groups of cached responses for current action, see posts.cache"""
+        if self.action == 'retrieve':
+            return [f'post:{Post._meta.pk.to_python(self.kwargs["pk"])}']
+        if self.action == 'get_by_user':
+            return [f'user_posts:{UserAccount._meta.pk.to_python(self.kwargs["pk"])}']
+        return ['posts']
+
+    @cache_response
+    def list(self, request, *args, **kwargs):
+        """
+        Get feed of posts, newest first
+        Method : Get
+        api/v1/posts/
+        Query params - {
+                compact=true: posts without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                sort=activity: recently commented posts first,
+                cursor=<next cursor>: next page
+            }
+        """
+        return super().list(request, *args, **kwargs)
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """
         Creating a post
@@ -145,15 +221,86 @@ class PostViewSet(mixins.CreateModelMixin,
         self.perform_destroy(instance)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(methods=['get'], detail=False)
+    @cache_response
+    def hot(self, request):
+        """
+        Get feed of posts ranked by likes, comments and views with decay by age
+        Method : Get
+        api/v1/posts/hot/
+        Query params - {
+                compact=true: posts without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                cursor=<next cursor>: next page
+            }
+        """
+        paginator = PostHotCursorPagination()
+        page = paginator.paginate_queryset(self.get_queryset(), request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['get'], detail=False, permission_classes=[IsAuthenticated])
+    def timeline(self, request):
+        """
+        Get home timeline, posts of followed users and own posts, newest first
+        Method : Get
+        api/v1/posts/timeline/
+        Headers - {Authorization: JWT <access token>}
+        Query params - {
+                compact=true: posts without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                cursor=<next cursor>: next page
+            }
+        """
+        paginator = TimelineCursorPagination()
+        # id only, safe requests may be authenticated by TokenUser of AUTH_TOKEN_USER_FOR_READS
+        page = paginator.paginate_timeline(request.user.id, self.get_queryset(), request)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(methods=['get'], detail=False)
+    def search(self, request):
+        """
+        Full-text search of posts by title, content and comments, best matches first
+        Method : Get
+        api/v1/posts/search/?q=<words>
+        Query params - {
+                compact=true: posts without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                page=<page number>: next page
+            }
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            raise APIValidationError({'q': 'This query parameter is required.'})
+        if len(query) > 200:
+            raise APIValidationError({'q': 'Ensure this query parameter has no more than 200 characters.'})
+
+        backend = get_search_backend()
+        queryset = self.get_queryset()
+        paginator = SearchPagination()
+        page = paginator.paginate_search(
+            lambda offset, limit: backend.search(queryset, query, offset, limit), request
+        )
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(methods=['get'], detail=True)
+    @cache_response
     def get_by_user(self, request, pk=None):
         """
-        Get all post of user
+        Get all post of user, newest first
         Method : Get
         api/v1/posts/<user_id>/get_by_user
+        Query params - {
+                compact=true: posts without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                cursor=<next cursor>: next page,
+                stream=true: all posts as streamed JSON array
+            }
         """
-        posts = Post.objects.filter(user=pk)
-        return Response(PostSerializer(posts, many=True).data)
+        posts = self.get_queryset().filter(user=pk)
+        return self.paginated_response(posts)
 
 
 class CommentViewSet(mixins.CreateModelMixin,
@@ -162,21 +309,53 @@ class CommentViewSet(mixins.CreateModelMixin,
                      mixins.DestroyModelMixin,
                      viewsets.GenericViewSet,
                      ViewsCounterMixin,
-                     LikeMixin
+                     LikeMixin,
+                     CompactModeMixin,
+                     PaginatedActionMixin
                      ):
     queryset = Comment.objects.all()
     serializer_class = PostCommentSerializer
+    compact_serializer_class = CompactPostCommentSerializer
+    prefetch_actions = ('retrieve', 'get_by_post')
+    pagination_class = CommentCursorPagination
     permission_classes = (IsAuthenticatedOrReadOnly, IsOwnerOrReadOnly)
 
+    def get_cache_groups(self):
+        """Groups of cached responses for current action, see posts.cache"""
+        if self.action == 'get_by_post':
+            return [f'post_comments:{Post._meta.pk.to_python(self.kwargs["pk"])}']
+        return [f'comment:{Comment._meta.pk.to_python(self.kwargs["pk"])}']
+
+    @cache_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            comment = serializer.save()
+            comment.user_post.count_comment(1)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            instance.user_post.count_comment(-1)
+
     @action(methods=['get'], detail=True)
+    @cache_response
     def get_by_post(self, request, pk=None):
         """
-        Get all comments for post
+        Get all comments for post, oldest first
         Method : Get
         api/v1/comments/<post_uuid>/get_by_post
+        Query params - {
+                compact=true: comments without 'liked_by' arrays,
+                with_liked=true: 'is_liked' of requesting user in every object,
+                cursor=<next cursor>: next page,
+                stream=true: all comments as streamed JSON array
+            }
         """
-        comments = Comment.objects.filter(user_post=pk)
-        return Response(PostCommentSerializer(comments, many=True).data)
+        comments = self.get_queryset().filter(user_post=pk)
+        return self.paginated_response(comments)
 
 
 # TODO: documentation, unittests
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class SecurityConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'security'
+
+    def ready(self):
+        # project-wide checks of app package are registered here too, app is not an installed application
+        from app import checks as app_checks  # noqa: F401
+        from security import checks  # noqa: F401
@@ -0,0 +1,97 @@
+from importlib.util import find_spec
+
+from django.conf import settings
+from django.core.checks import Warning, register
+
+
+def get_worker_cache_backend(alias):
+    """Name of cache backend of alias, if it is not shared by worker processes"""
+    backend = settings.CACHES[alias]['BACKEND']
+    if backend.endswith(('LocMemCache', 'DummyCache')):
+        return backend.rsplit('.', 1)[-1]
+    return None
+
+
+@register('throttling', deploy=True)
+def check_throttle_cache(app_configs, **kwargs):
+    """Warn about throttle counters kept in memory of every worker"""
+    backend = get_worker_cache_backend(settings.THROTTLE_CACHE_ALIAS)
+    if backend is None:
+        return []
+    return [Warning(
+        f'Throttling counters are kept by {backend}, which is not shared by workers.',
+        hint='Set REDIS_URL, otherwise every worker allows full rate and limits multiply by number of workers.',
+        id='security.W104',
+    )]
+
+
+@register('caches', deploy=True)
+def check_auth_user_cache(app_configs, **kwargs):
+    """Warn about authenticated users cached in memory of every worker"""
+    backend = get_worker_cache_backend(settings.AUTH_USER_CACHE_ALIAS)
+    if backend is None or not settings.AUTH_USER_CACHE_TIMEOUT:
+        return []
+    return [Warning(
+        f'Authenticated users are cached by {backend}, which is not shared by workers.',
+        hint='Set REDIS_URL or AUTH_USER_CACHE_TIMEOUT=0, otherwise deactivation of user is seen by other workers '
+             f'only after AUTH_USER_CACHE_TIMEOUT ({settings.AUTH_USER_CACHE_TIMEOUT} seconds).',
+        id='security.W108',
+    )]
+
+
+@register('caches', deploy=True)
+def check_response_cache(app_configs, **kwargs):
+    """Warn about cached responses kept in memory of every worker"""
+    backend = get_worker_cache_backend(settings.RESPONSE_CACHE_ALIAS)
+    if backend is None or not settings.RESPONSE_CACHE_TIMEOUT:
+        return []
+    return [Warning(
+        f'Responses are cached by {backend}, which is not shared by workers.',
+        hint='Set REDIS_URL or RESPONSE_CACHE_TIMEOUT=0, otherwise invalidation reaches only the worker of change, '
+             f'other workers serve stale responses for RESPONSE_CACHE_TIMEOUT ({settings.RESPONSE_CACHE_TIMEOUT} '
+             'seconds).',
+        id='security.W109',
+    )]
+
+
+@register('passwords')
+def check_password_hasher(app_configs, **kwargs):
+    """Warn about requested password hasher which is not applied"""
+    if settings.PASSWORD_HASHER not in settings.PASSWORD_HASHER_CLASSES:
+        return [Warning(
+            f'PASSWORD_HASHER {settings.PASSWORD_HASHER!r} is unknown.',
+            hint=f'Use one of: {", ".join(settings.PASSWORD_HASHER_CLASSES)}.',
+            id='security.W105',
+        )]
+    if settings.PASSWORD_HASHER != 'argon2' or find_spec('argon2') is not None:
+        return []
+    return [Warning(
+        "PASSWORD_HASHER is 'argon2', but argon2-cffi is not installed (pip install argon2-cffi).",
+        hint=f'New passwords are hashed by {settings.PASSWORD_HASHERS[0].rsplit(".", 1)[-1]} instead.',
+        id='security.W105',
+    )]
+
+
+@register('passwords', deploy=True)
+def check_fast_password_hasher(app_configs, **kwargs):
+    """Warn about fast hasher of test settings used in production"""
+    hasher = settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]
+    if hasher not in ('MD5PasswordHasher', 'UnsaltedMD5PasswordHasher', 'UnsaltedSHA1PasswordHasher'):
+        return []
+    return [Warning(
+        f'Passwords are hashed by {hasher}, which is meant for tests only.',
+        hint='Use PASSWORD_HASHER setting of app.settings.base instead of test PASSWORD_HASHERS.',
+        id='security.W106',
+    )]
+
+
+@register('metrics', deploy=True)
+def check_metrics_token(app_configs, **kwargs):
+    """Warn about metrics readable by anyone"""
+    if not settings.METRICS_ENABLED or settings.METRICS_TOKEN:
+        return []
+    return [Warning(
+        'Metrics are enabled without METRICS_TOKEN, /metrics/ is readable by anyone.',
+        hint='Set METRICS_TOKEN and scrape with "Authorization: Bearer <token>", or disable METRICS_ENABLED.',
+        id='security.W107',
+    )]
@@ -0,0 +1,38 @@
+from contextlib import contextmanager
+
+from django.core.management.commands.migrate import Command as MigrateCommand
+from django.db import connections
+
+# key of PostgreSQL advisory lock held while migrations are applied
+MIGRATE_LOCK_ID = 7204196001
+
+
+@contextmanager
+def advisory_lock(connection):
+    """
+    Hold session advisory lock on PostgreSQL, so concurrent release phases apply migrations one by one.
+    Other databases are not locked
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT pg_advisory_lock(%s)', [MIGRATE_LOCK_ID])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_advisory_unlock(%s)', [MIGRATE_LOCK_ID])
+
+
+class Command(MigrateCommand):
+    help = (
+        'Apply committed migrations under database lock, run once in release phase before web processes start. '
+        'Accepts arguments of migrate'
+    )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        with advisory_lock(connection):
+            # migrations applied by other release while waiting for lock are already in plan of migrate
+            super().handle(*args, **options)
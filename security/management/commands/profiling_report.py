@@ -0,0 +1,72 @@
+import json
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values: list, share: float):
+    """Value below which 'share' of sorted values are"""
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+class Command(BaseCommand):
+    help = 'Aggregate records of QueryProfilingMiddleware by route, most expensive routes first'
+    sort_keys = {
+        'total': lambda row: row['requests'] * row['avg_ms'],
+        'queries': lambda row: row['avg_queries'],
+        'db': lambda row: row['avg_db_ms'],
+        'requests': lambda row: row['requests'],
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--file', help='records file, QUERY_PROFILING_FILE by default')
+        parser.add_argument(
+            '--sort', choices=list(self.sort_keys), default='total', help='total - time of all requests of route'
+        )
+        parser.add_argument('--limit', type=int, default=20, help='routes in report')
+
+    def handle(self, *args, file=None, sort='total', limit=20, **options):
+        path = file or settings.QUERY_PROFILING_FILE
+        try:
+            with open(path) as records_file:
+                records = [json.loads(line) for line in records_file if line.strip()]
+        except OSError as err:
+            raise CommandError(f'no profiling records: {err}')
+
+        rows = sorted(self.aggregate(records), key=self.sort_keys[sort], reverse=True)[:limit]
+        header = f'{"route":<50} {"requests":>8} {"queries":>8} {"max q":>6} {"db ms":>8} {"avg ms":>8} ' \
+                 f'{"p95 ms":>8} {"avg KB":>8} {"N+1":>5}'
+        self.stdout.write(header)
+        for row in rows:
+            size = f'{row["avg_kb"]:.1f}' if row['avg_kb'] is not None else '-'
+            self.stdout.write(
+                f'{row["route"][:50]:<50} {row["requests"]:>8} {row["avg_queries"]:>8.1f} {row["max_queries"]:>6} '
+                f'{row["avg_db_ms"]:>8.1f} {row["avg_ms"]:>8.1f} {row["p95_ms"]:>8.1f} {size:>8} {row["repeated"]:>5}'
+            )
+
+    @staticmethod
+    def aggregate(records) -> list:
+        """Statistics of every route"""
+        routes = defaultdict(list)
+        for record in records:
+            routes[record['route']].append(record)
+
+        rows = []
+        for route, route_records in routes.items():
+            requests = len(route_records)
+            totals = sorted(record['total_ms'] for record in route_records)
+            sizes = [record['size'] for record in route_records if record['size'] is not None]
+            rows.append({
+                'route': route,
+                'requests': requests,
+                'avg_queries': sum(record['queries'] for record in route_records) / requests,
+                'max_queries': max(record['queries'] for record in route_records),
+                'avg_db_ms': sum(record['db_ms'] for record in route_records) / requests,
+                'avg_ms': sum(totals) / requests,
+                'p95_ms': percentile(totals, 0.95),
+                'avg_kb': sum(sizes) / len(sizes) / 1024 if sizes else None,
+                # requests with N+1 queries
+                'repeated': sum(1 for record in route_records if record['repeated']),
+            })
+        return rows
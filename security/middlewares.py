@@ -1,3 +1,19 @@
+import json
+import logging
+import random
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from app.metrics import REQUESTS, LATENCY
+
+profiling_logger = logging.getLogger('security.profiling')
+
+
 class RemoveServerHeaderMiddleware:
     """
     remove security header from responses for better web server safety
@@ -9,3 +25,122 @@ class RemoveServerHeaderMiddleware:
         response = self.get_response(request)
         response.__setitem__('Server', 'lol')
         return response
+
+
+class RateLimitHeadersMiddleware:
+    """
+    put quota of the most restrictive throttle of request to response headers, see app.throttling
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        quota = getattr(request, 'rate_limit', None)
+        if quota is not None:
+            response['X-RateLimit-Limit'] = quota['limit']
+            response['X-RateLimit-Remaining'] = quota['remaining']
+            response['X-RateLimit-Reset'] = quota['reset']
+        return response
+
+
+class QueryProfilingMiddleware:
+    """
+    profile sampled requests: queries, time in database, rendering and whole request, size of response.
+    Timings are returned in Server-Timing header, repeated identical SQL (N+1 queries) is logged,
+    records are appended to QUERY_PROFILING_FILE for 'manage.py profiling_report'.
+    Disabled by default and removed from middleware chain then, so it costs nothing
+    """
+    def __init__(self, get_response):
+        if not settings.QUERY_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if random.random() >= settings.QUERY_PROFILING_SAMPLE_RATE:
+            return self.get_response(request)
+
+        queries = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(queries))
+            response = self.get_response(request)
+        total = time.perf_counter() - started
+        rendered_at = getattr(request, 'profiling_view_end', None)
+        render = time.perf_counter() - rendered_at if rendered_at else 0
+
+        route = f'{request.method} {getattr(request.resolver_match, "view_name", None) or request.path}'
+        repeated = queries.get_repeated(settings.QUERY_PROFILING_REPEATED_QUERIES)
+        for sql, count in repeated:
+            profiling_logger.warning('N+1 queries in %s: %s x %s', route, count, sql)
+
+        response['Server-Timing'] = (
+            f'db;dur={queries.duration * 1000:.1f};desc="{queries.count} queries", '
+            f'render;dur={render * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        self.write_record({
+            'route': route,
+            'status': response.status_code,
+            'queries': queries.count,
+            'db_ms': round(queries.duration * 1000, 2),
+            'render_ms': round(render * 1000, 2),
+            'total_ms': round(total * 1000, 2),
+            'size': None if response.streaming else len(response.content),
+            'repeated': len(repeated),
+        })
+        return response
+
+    def process_template_response(self, request, response):
+        # view has returned, DRF responses are rendered after this hook
+        request.profiling_view_end = time.perf_counter()
+        return response
+
+    @staticmethod
+    def write_record(record):
+        if settings.QUERY_PROFILING_FILE:
+            with open(settings.QUERY_PROFILING_FILE, 'a') as file:
+                file.write(json.dumps(record) + '\n')
+
+
+class QueryRecorder:
+    """
+    database execute wrapper counting queries and their time, identical SQL is counted without parameters
+    """
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    def get_repeated(self, threshold):
+        """Statements executed at least 'threshold' times, most repeated first"""
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class MetricsMiddleware:
+    """
+    count requests and their duration by view, see app.metrics
+    """
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        # view names instead of paths, so ids of objects don't make new series
+        view = getattr(request.resolver_match, 'view_name', None) or 'unresolved'
+        LATENCY.observe(time.perf_counter() - started, view, request.method)
+        REQUESTS.inc(view, request.method, str(response.status_code))
+        return response
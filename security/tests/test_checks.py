@@ -0,0 +1,104 @@
+from unittest import mock
+
+import django
+from django.core.checks import Info, Warning
+from django.test import SimpleTestCase, override_settings
+
+from app.checks import check_database_connections, report_database_connections
+from security.checks import (
+    check_throttle_cache, check_password_hasher, check_fast_password_hasher, check_metrics_token,
+    check_auth_user_cache, check_response_cache,
+)
+
+POSTGRES = {
+    'ENGINE': 'django.db.backends.postgresql',
+    'CONN_MAX_AGE': 60,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {'connect_timeout': 5},
+}
+
+
+class DatabaseConnectionsChecksTests(SimpleTestCase):
+    @override_settings(DATABASES={'default': POSTGRES}, DB_POOL=True)
+    def test_pool_not_supported(self):
+        """test: enabled pool, which is not applied, is reported"""
+        if django.VERSION >= (5, 1):
+            self.skipTest('Django supports pooling')
+        messages = check_database_connections(None)
+        self.assertEqual([message.id for message in messages], ['app.W001'])
+
+    @override_settings(DATABASES={'default': POSTGRES}, DB_POOL=False, DB_STATEMENT_TIMEOUT=0)
+    def test_report(self):
+        """test: effective configuration is reported, missing statement timeout is warned"""
+        self.assertEqual(check_database_connections(None), [])
+        messages = report_database_connections(None)
+        self.assertIsInstance(messages[0], Info)
+        self.assertIn('persistent connections for 60 seconds, with health checks', messages[0].msg)
+        self.assertEqual([message.id for message in messages if isinstance(message, Warning)], ['app.W002'])
+
+    @override_settings(
+        DATABASES={'default': {**POSTGRES, 'CONN_MAX_AGE': 0, 'OPTIONS': {'options': '-c statement_timeout=500'}}},
+        DB_STATEMENT_TIMEOUT=500,
+    )
+    def test_connection_per_request(self):
+        """test: connection opened for every request is warned"""
+        messages = report_database_connections(None)
+        self.assertIn('new connection for every request', messages[0].msg)
+        self.assertEqual([message.id for message in messages[1:]], ['app.W003'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_throttle_cache(self):
+        """test: throttling on cache of worker process is warned"""
+        self.assertEqual([message.id for message in check_throttle_cache(None)], ['security.W104'])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_auth_user_cache(self):
+        """test: users cached in memory of worker process are warned, unless cache is disabled"""
+        self.assertEqual([message.id for message in check_auth_user_cache(None)], ['security.W108'])
+        with override_settings(AUTH_USER_CACHE_TIMEOUT=0):
+            self.assertEqual(check_auth_user_cache(None), [])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+    def test_response_cache(self):
+        """test: responses cached in memory of worker process are warned"""
+        self.assertEqual([message.id for message in check_response_cache(None)], ['security.W109'])
+
+
+class PasswordHasherChecksTests(SimpleTestCase):
+    @override_settings(PASSWORD_HASHER='argon2', PASSWORD_HASHERS=[
+        'django.contrib.auth.hashers.ScryptPasswordHasher',
+        'django.contrib.auth.hashers.Argon2PasswordHasher',
+    ])
+    def test_hasher_not_installed(self):
+        """test: requested hasher without its library is warned"""
+        with mock.patch('security.checks.find_spec', return_value=None):
+            messages = check_password_hasher(None)
+        self.assertEqual([message.id for message in messages], ['security.W105'])
+        self.assertIn('ScryptPasswordHasher', messages[0].hint)
+
+    @override_settings(PASSWORD_HASHER='scrypt', PASSWORD_HASHERS=['django.contrib.auth.hashers.ScryptPasswordHasher'])
+    def test_hasher(self):
+        """test: requested hasher in use is not warned"""
+        self.assertEqual(check_password_hasher(None), [])
+        self.assertEqual(check_fast_password_hasher(None), [])
+
+    @override_settings(PASSWORD_HASHER='bcrypt')
+    def test_unknown_hasher(self):
+        """test: unknown hasher is warned"""
+        self.assertEqual([message.id for message in check_password_hasher(None)], ['security.W105'])
+
+    def test_fast_hasher(self):
+        """test: test settings hasher is warned on deploy"""
+        self.assertEqual([message.id for message in check_fast_password_hasher(None)], ['security.W106'])
+
+
+class MetricsChecksTests(SimpleTestCase):
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN='')
+    def test_metrics_without_token(self):
+        """test: open metrics are warned"""
+        self.assertEqual([message.id for message in check_metrics_token(None)], ['security.W107'])
+
+    @override_settings(METRICS_ENABLED=True, METRICS_TOKEN='secret')
+    def test_metrics_with_token(self):
+        """test: metrics protected by token are not warned"""
+        self.assertEqual(check_metrics_token(None), [])
@@ -0,0 +1,46 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from security import views
+
+
+class DeployTests(TestCase):
+    def setUp(self):
+        """set up for every test"""
+        views.migrations_applied = False
+
+    def test_migrations_committed(self):
+        """test: models have no changes missing from committed migrations"""
+        try:
+            call_command('makemigrations', '--check', '--dry-run', stdout=StringIO())
+        except SystemExit:
+            self.fail('models have changes without migrations, run makemigrations')
+
+    def test_migrate_locked(self):
+        """test: release migrate runs with arguments of migrate"""
+        out = StringIO()
+        call_command('migrate_locked', '--plan', stdout=out)
+        self.assertIn('No planned migration operations', out.getvalue())
+
+    def test_health(self):
+        """test: readiness waits for migrations, liveness doesn't touch database"""
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('health-live'))
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch('security.views.MigrationExecutor.migration_plan', return_value=[object()]):
+            response = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json(), {'status': 'migrations pending', 'pending': 1})
+
+        response = self.client.get(reverse('health-ready'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(views.migrations_applied)
+
+        # applied migrations are not checked again
+        with self.assertNumQueries(0):
+            self.client.get(reverse('health-ready'))
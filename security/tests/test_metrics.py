@@ -0,0 +1,94 @@
+import json
+import os
+import re
+import tempfile
+import threading
+
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+
+from app.metrics import LIKES, registry
+from posts.tests.setup_fabric import SetUpFabric
+
+# pid above default pid_max, there is no such process
+STOPPED_PID = 4194305
+
+
+def get_value(text, series) -> float:
+    """Value of series in exposition text, 0 if series is absent"""
+    match = re.search(rf'^{re.escape(series)} (\S+)$', text, re.MULTILINE)
+    return float(match.group(1)) if match else 0
+
+
+class MetricsTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        cache.clear()
+        self.setup_users()
+        self.setup_posts()
+        self.setup_tokens()
+        self.likes_series = 'likes_total{model="post",result="liked"}'
+
+    def test_metrics(self):
+        """test: requests and likes are counted, histogram of request duration is exposed"""
+        before = self.client.get(reverse('metrics')).content.decode()
+        self.user1.in_test_api_auth(self.client, self.token1)
+        self.client.post(reverse('posts-like', kwargs={'pk': self.post1.pk}))
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertEqual(get_value(text, self.likes_series) - get_value(before, self.likes_series), 1)
+        requests_series = 'http_requests_total{view="posts-like",method="POST",status="200"}'
+        self.assertEqual(get_value(text, requests_series) - get_value(before, requests_series), 1)
+        self.assertIn('# TYPE http_request_duration_seconds histogram', text)
+        self.assertEqual(
+            get_value(text, 'http_request_duration_seconds_bucket{view="posts-like",method="POST",le="+Inf"}'),
+            get_value(text, 'http_request_duration_seconds_count{view="posts-like",method="POST"}'),
+        )
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        """test: metrics are protected by token when it is set"""
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_threads(self):
+        """test: increments of threads are not lost"""
+        before = registry.collect().get(('likes_total', ('comment', 'liked'), None), 0)
+
+        def like():
+            for _ in range(1000):
+                LIKES.inc('comment', 'liked')
+
+        threads = [threading.Thread(target=like) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(registry.collect()[('likes_total', ('comment', 'liked'), None)] - before, 4000)
+
+    def test_workers(self):
+        """test: metrics of all workers are summed, files of stopped workers are archived"""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        own = get_value(registry.render(), self.likes_series)
+        for pid, likes in ((os.getppid(), 5), (STOPPED_PID, 2)):
+            with open(os.path.join(directory.name, f'metrics_{pid}.json'), 'w') as file:
+                json.dump([['likes_total', ['post', 'liked'], None, likes]], file)
+
+        with override_settings(METRICS_DIR=directory.name, METRICS_FLUSH_INTERVAL=0):
+            self.assertEqual(get_value(registry.render(), self.likes_series), own + 7)
+            # archived values are still counted
+            self.assertEqual(get_value(registry.render(), self.likes_series), own + 7)
+
+        files = sorted(os.listdir(directory.name))
+        self.assertIn('metrics_archive.json', files)
+        self.assertNotIn(f'metrics_{STOPPED_PID}.json', files)
+        self.assertIn(f'metrics_{os.getpid()}.json', files)
@@ -0,0 +1,68 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from rest_framework.test import APITestCase
+
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.tests.setup_fabric import SetUpFabric
+from security.middlewares import QueryProfilingMiddleware
+
+
+class QueryProfilingTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        self.setup_users()
+        self.setup_posts()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.records_file = os.path.join(directory.name, 'profiling.jsonl')
+
+    def test_disabled(self):
+        """test: middleware is removed from chain when profiling is off"""
+        response = self.client.get(reverse('posts-list'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_profiling(self):
+        """test: profiled request has timings in header and record for report"""
+        with override_settings(QUERY_PROFILING=True, QUERY_PROFILING_FILE=self.records_file):
+            response = self.client.get(reverse('posts-list'), {'compact': 'true'})
+            self.client.get(reverse('posts-list'), {'compact': 'true'})
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", render;dur=[\d.]+, total')
+        with open(self.records_file) as file:
+            record = json.loads(file.readline())
+        self.assertEqual(record['route'], 'GET posts-list')
+        self.assertEqual(record['size'], len(response.content))
+        self.assertGreaterEqual(record['queries'], 1)
+
+        out = StringIO()
+        call_command('profiling_report', file=self.records_file, stdout=out)
+        route_row = out.getvalue().splitlines()[1].split()
+        self.assertEqual(route_row[:3], ['GET', 'posts-list', '2'])
+
+    def test_repeated_queries(self):
+        """test: identical SQL executed many times in one request is logged"""
+        def view(request):
+            for post_id in Post.objects.values_list('id', flat=True):
+                Post.objects.get(pk=post_id)
+            return HttpResponse()
+
+        with override_settings(QUERY_PROFILING=True, QUERY_PROFILING_FILE='', QUERY_PROFILING_REPEATED_QUERIES=2):
+            with self.assertLogs('security.profiling', 'WARNING') as logs:
+                response = QueryProfilingMiddleware(view)(RequestFactory().get('/posts/'))
+        self.assertIn('3 queries', response['Server-Timing'])
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn('N+1 queries in GET /posts/: 2 x SELECT', logs.output[0])
+
+    def test_sampling(self):
+        """test: requests out of sample are not profiled"""
+        with override_settings(QUERY_PROFILING=True, QUERY_PROFILING_SAMPLE_RATE=0):
+            response = self.client.get(reverse('posts-list'))
+        self.assertNotIn('Server-Timing', response)
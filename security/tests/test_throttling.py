@@ -0,0 +1,67 @@
+from unittest import mock
+
+from rest_framework import status
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from django.core.cache import cache
+from django.urls import reverse
+
+from app.throttling import AnonRateThrottle, ScopedRateThrottle
+from posts.tests.setup_fabric import SetUpFabric
+
+
+class ThrottlingTests(APITestCase, SetUpFabric):
+    def setUp(self):
+        """set up for every test"""
+        cache.clear()
+        self.setup_users()
+        self.setup_posts()
+        self.setup_tokens()
+
+    def test_sliding_window(self):
+        """test: requests of previous window are counted by weight of its remaining part"""
+        request = Request(APIRequestFactory().get('/'))
+        throttle = AnonRateThrottle()
+        throttle.num_requests, throttle.duration = 10, 60
+
+        with mock.patch.object(throttle, 'timer', return_value=600):
+            self.assertTrue(all(throttle.allow_request(request, None) for _ in range(10)))
+            self.assertFalse(throttle.allow_request(request, None))
+            self.assertEqual(throttle.wait(), 60 + 60 * (1 - 10 / 11))
+
+        # 11 requests of previous window weigh 5.5 in the middle of next one
+        request = Request(APIRequestFactory().get('/'))
+        with mock.patch.object(throttle, 'timer', return_value=690):
+            self.assertTrue(all(throttle.allow_request(request, None) for _ in range(4)))
+            self.assertEqual(request._request.rate_limit, {'limit': 10, 'remaining': 0, 'reset': 30})
+            self.assertFalse(throttle.allow_request(request, None))
+            self.assertAlmostEqual(throttle.wait(), 60 * (1 - 5 / 11) - 30)
+
+        # one counter per window, no matter how many requests were made
+        self.assertEqual(cache.get(f'{throttle.key}:10'), 11)
+        self.assertEqual(cache.get(f'{throttle.key}:11'), 5)
+
+    @mock.patch.object(ScopedRateThrottle, 'THROTTLE_RATES', {'like': '2/minute'})
+    def test_scope(self):
+        """test: endpoint scope limits writes of user, quota is in headers"""
+        self.user1.in_test_api_auth(self.client, self.token1)
+        url = reverse('posts-like', kwargs={'pk': self.post1.pk})
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['X-RateLimit-Limit'], '2')
+        self.assertEqual(response['X-RateLimit-Remaining'], '1')
+        self.assertEqual(self.client.post(url)['X-RateLimit-Remaining'], '0')
+
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+        # reads are not limited by scope
+        response = self.client.get(reverse('posts-detail', kwargs={'pk': self.post1.pk}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # scope is counted for every user
+        self.user2.in_test_api_auth(self.client, self.token2)
+        self.assertEqual(self.client.post(url).status_code, status.HTTP_200_OK)
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.db.migrations.executor import MigrationExecutor
+from django.http import Http404, HttpResponse, JsonResponse
+
+from app.metrics import registry
+
+# migrations are not rolled back under running process, so they are checked until applied once
+migrations_applied = False
+
+
+def liveness(request):
+    """
+    Method : Get
+    /health/live/
+    Process is able to serve requests, database is not touched
+    """
+    return JsonResponse({'status': 'ok'})
+
+
+def readiness(request):
+    """
+    Method : Get
+    /health/ready/
+    Process can take traffic: database is reachable and all committed migrations are applied.
+    503 otherwise, so load balancer keeps sending requests to previous release
+    """
+    global migrations_applied
+    try:
+        connection.ensure_connection()
+        if not migrations_applied:
+            executor = MigrationExecutor(connection)
+            plan = executor.migration_plan(executor.loader.graph.leaf_nodes())
+            if plan:
+                return JsonResponse({'status': 'migrations pending', 'pending': len(plan)}, status=503)
+            migrations_applied = True
+    except DatabaseError:
+        return JsonResponse({'status': 'database unavailable'}, status=503)
+    return JsonResponse({'status': 'ready'})
+
+
+def metrics(request):
+    """
+    Method : Get
+    /metrics/
+    Headers - {Authorization: Bearer <METRICS_TOKEN>} (if token is set)
+    Metrics of all workers in Prometheus text format
+    """
+    if not settings.METRICS_ENABLED:
+        raise Http404
+    if settings.METRICS_TOKEN and request.headers.get('Authorization') != f'Bearer {settings.METRICS_TOKEN}':
+        return HttpResponse(status=403)
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')